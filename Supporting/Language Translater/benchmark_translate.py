@@ -0,0 +1,219 @@
+# HealthDex/Supporting/Language Translater/benchmark_translate.py
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import tempfile
+import threading
+import contextlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from xml.sax.saxutils import escape as escape_xml
+
+import translate_strings
+
+# Mix of entry shapes found in the real PHMS strings.xml
+SYNTHETIC_WORDS = [
+    "blood", "pressure", "heart", "rate", "medication", "reminder", "appointment", "doctor",
+    "daily", "goal", "calories", "protein", "weight", "note", "emergency", "contact", "save",
+    "cancel", "delete", "history", "today", "record", "value", "unit", "health", "check",
+]
+SYNTHETIC_PLACEHOLDERS = ["%1$s", "%1$d", "%2$d", "%s", "%d", "%.1f"]
+
+class StubStats:
+    """Thread-safe request counters and per-request latencies collected by the stub server."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.strings = 0
+        self.errors = 0
+        self.latencies = []
+
+    def record(self, strings, latency, error):
+        with self.lock:
+            self.requests += 1
+            self.strings += strings
+            self.errors += int(error)
+            self.latencies.append(latency)
+
+class StubLibreTranslateHandler(BaseHTTPRequestHandler):
+    """Minimal /languages and /translate endpoints with configurable latency, errors and mangling."""
+
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real server behind gunicorn
+    # Send headers and body in one segment; separate small writes stall on delayed ACKs (~40 ms)
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/languages":
+            self.send_json(404, {"error": "Not found"})
+            return
+        self.send_json(200, [{"code": code, "name": name} for code, name in translate_strings.SUPPORTED_LANGUAGES.items()])
+
+    def do_POST(self):
+        started = time.perf_counter()
+        config = self.server.config
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/translate":
+            self.send_json(404, {"error": "Not found"})
+            return
+        data = json.loads(body)
+        texts = data["q"] if isinstance(data["q"], list) else [data["q"]]
+        # Latency grows with the payload, like a real model
+        time.sleep((config.latency_ms + config.latency_per_string_ms * len(texts)) / 1000.0)
+
+        if random.random() < config.error_rate:
+            self.send_json(503, {"error": "Simulated overload"})
+            self.server.stats.record(len(texts), time.perf_counter() - started, True)
+            return
+
+        translated = [self.translate(text, data["target"], config.mangle_rate) for text in texts]
+        self.send_json(200, {"translatedText": translated if isinstance(data["q"], list) else translated[0]})
+        self.server.stats.record(len(texts), time.perf_counter() - started, False)
+
+    @staticmethod
+    def translate(text, target_lang, mangle_rate):
+        if random.random() < mangle_rate:
+            # The kind of damage seen from real models: underscores split from the marker
+            text = text.replace("__PHMSPH", "_ PHMSPH")
+        return f"[{target_lang}] {text}"
+
+@contextlib.contextmanager
+def stub_server(config):
+    """Runs the stub LibreTranslate server on a free local port for the duration of the block."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubLibreTranslateHandler)
+    server.daemon_threads = True
+    server.config = config
+    server.stats = StubStats()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def write_synthetic_strings(path, keys, seed):
+    """Writes a strings.xml with `keys` entries: plain strings, placeholders and string arrays."""
+    rng = random.Random(seed)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<resources>\n')
+        for i in range(keys):
+            words = " ".join(rng.choice(SYNTHETIC_WORDS) for _ in range(rng.randint(1, 12))).capitalize()
+            if i % 40 == 39:
+                f.write(f'    <string-array name="bench_array_{i}">\n')
+                for _ in range(rng.randint(3, 8)):
+                    f.write(f"        <item>{escape_xml(words)}</item>\n")
+                f.write("    </string-array>\n")
+                continue
+            if i % 5 == 0:
+                words = f"{words}: {rng.choice(SYNTHETIC_PLACEHOLDERS)}"
+            f.write(f'    <string name="bench_key_{i}">{escape_xml(words)}</string>\n')
+        f.write("</resources>\n")
+
+def percentile(values, fraction):
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def run_benchmark(args, extra_args):
+    """Runs translate_strings.main() against the stub server and returns the measurements."""
+    languages = [code for code in translate_strings.SUPPORTED_LANGUAGES if code != 'en'][:args.languages]
+    with tempfile.TemporaryDirectory(prefix="translate-bench-") as work_dir, stub_server(args) as server:
+        res_dir = os.path.join(work_dir, "res")
+        source = os.path.join(res_dir, "values", "strings.xml")
+        write_synthetic_strings(source, args.keys, args.seed)
+
+        argv = [
+            "translate_strings.py",
+            "--source", source,
+            "--res-dir", res_dir,
+            "--memory", os.path.join(work_dir, "translation_memory.jsonl"),
+            "--url", f"http://127.0.0.1:{server.server_port}",
+            "--languages", *languages,
+        ] + extra_args
+
+        saved_argv = sys.argv
+        started = time.perf_counter()
+        try:
+            sys.argv = argv
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+                translate_strings.main()
+            exit_code = 0
+        except SystemExit as e:
+            exit_code = e.code or 0
+        finally:
+            sys.argv = saved_argv
+        elapsed = time.perf_counter() - started
+
+        stats = server.stats
+        with stats.lock:
+            latencies = list(stats.latencies)
+            return {
+                'keys': args.keys,
+                'languages': len(languages),
+                'extra_args': extra_args,
+                'exit_code': exit_code,
+                'seconds': round(elapsed, 3),
+                'requests': stats.requests,
+                'errors': stats.errors,
+                'strings_translated': stats.strings,
+                'requests_per_second': round(stats.requests / elapsed, 2) if elapsed else 0.0,
+                'strings_per_second': round(stats.strings / elapsed, 2) if elapsed else 0.0,
+                'latency_p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+                'latency_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+                # ru_maxrss is KiB on Linux and bytes on macOS; includes the in-process stub server
+                'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1),
+            }
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark translate_strings.py against an in-process stub LibreTranslate server",
+        epilog="Arguments after '--' are passed to translate_strings.py, e.g. -- --jobs 4 --batch-size 100"
+    )
+    parser.add_argument("--keys", type=int, default=400, help="Number of synthetic resource entries")
+    parser.add_argument("--languages", type=int, default=4, help="Number of target languages (max 15)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Fixed stub latency per request")
+    parser.add_argument("--latency-per-string-ms", type=float, default=1.0, help="Extra stub latency per string in a request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of /translate requests answered with 503")
+    parser.add_argument("--mangle-rate", type=float, default=0.0, help="Fraction of strings whose placeholders get mangled")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the synthetic strings.xml")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show translate_strings.py output")
+
+    argv = sys.argv[1:]
+    extra_args = []
+    if "--" in argv:
+        extra_args = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args, extra_args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Benchmark: {results['keys']} keys x {results['languages']} languages {' '.join(extra_args)}")
+    print(f"  Wall time:        {results['seconds']:.3f}s (exit code {results['exit_code']})")
+    print(f"  Requests:         {results['requests']} ({results['errors']} simulated errors), {results['requests_per_second']:.1f} req/s")
+    print(f"  Strings:          {results['strings_translated']}, {results['strings_per_second']:.1f} strings/s")
+    print(f"  Request latency:  p50 {results['latency_p50_ms']:.1f} ms, p99 {results['latency_p99_ms']:.1f} ms")
+    print(f"  Peak RSS:         {results['peak_rss_mb']:.1f} MB")
+
+if __name__ == "__main__":
+    main()
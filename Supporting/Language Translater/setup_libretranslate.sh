@@ -22,21 +22,29 @@ fi
 echo "Starting LibreTranslate with Docker..."
 docker run -d --name libretranslate -p 5003:5000 libretranslate/libretranslate --load-only "$REQUIRED_LANGS"
 
-echo "Waiting for LibreTranslate to initialize (this might take a while depending on model downloads)..."
-sleep 15 # Increased sleep time
-
-if docker ps | grep -q libretranslate; then
-    echo "LibreTranslate started successfully!"
-    echo "Checking loaded languages (may take a moment)..."
-    sleep 5
-    LOADED_LANGS=$(curl -s http://localhost:5003/languages | jq -r '.[].code' | paste -sd, || echo "jq not found or curl failed")
-    echo "Currently loaded languages reported by API: $LOADED_LANGS"
-else
-    echo "Failed to start LibreTranslate. Please check docker logs:"
-    echo "docker logs libretranslate"
-    exit 1
-fi
-
+# Poll until the API answers instead of sleeping a fixed time; back off from 1s up to 8s between attempts
+READY_TIMEOUT=${READY_TIMEOUT:-300}
+echo "Waiting up to ${READY_TIMEOUT}s for LibreTranslate to initialize (this might take a while depending on model downloads)..."
+START_TIME=$(date +%s)
+DELAY=1
+until curl -sf http://localhost:5003/languages > /dev/null; do
+    if ! docker ps --format '{{.Names}}' | grep -q "^libretranslate$"; then
+        echo "Failed to start LibreTranslate. Please check docker logs:"
+        echo "docker logs libretranslate"
+        exit 1
+    fi
+    if [ $(( $(date +%s) - START_TIME )) -ge "$READY_TIMEOUT" ]; then
+        echo "LibreTranslate did not become ready within ${READY_TIMEOUT}s. Please check docker logs:"
+        echo "docker logs libretranslate"
+        exit 1
+    fi
+    sleep "$DELAY"
+    DELAY=$(( DELAY < 8 ? DELAY * 2 : 8 ))
+done
+
+echo "LibreTranslate started successfully after $(( $(date +%s) - START_TIME ))s!"
+LOADED_LANGS=$(curl -s http://localhost:5003/languages | jq -r '.[].code' | paste -sd, || echo "jq not found or curl failed")
+echo "Currently loaded languages reported by API: $LOADED_LANGS"
 
 echo "LibreTranslate should now be running at http://localhost:5003"
 echo "You can use the translation script to translate your app strings."
\ No newline at end of file
@@ -3,14 +3,74 @@ import os
 import re
 import sys
 import json
+import glob
 import argparse
+import hashlib
+import random
+import tempfile
+import threading
+import time
+import contextlib
+import html
+from collections import Counter, defaultdict, deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import xml.etree.ElementTree as ET
 import requests
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin
-from xml.dom import minidom
-import copy # Needed for deep copying attributes
+from xml.sax.saxutils import quoteattr
 
 LIBRETRANSLATE_URL = "http://localhost:5003"
+# Default --backend; the backend name is also recorded in the translation memory
+TRANSLATION_ENGINE = "libretranslate"
+# Limits for one /translate request with an array `q`
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_BATCH_BYTES = 16 * 1024
+# Upper bound on concurrent /translate requests across all language workers
+DEFAULT_MAX_IN_FLIGHT = 4
+# Characters sent per second across all workers (0: unlimited), for a LibreTranslate shared with other projects
+DEFAULT_CHARS_PER_SECOND = 0
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 60
+DEFAULT_MAX_RETRIES = 4
+# Exponential backoff with full jitter: sleep up to min(MAX, BASE * 2**attempt) seconds
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Responses that mean the server itself is overloaded or down (a 500 usually means one bad input)
+OVERLOAD_STATUS_CODES = {429, 502, 503, 504}
+# The circuit opens after this many consecutive overload failures and pauses all requests
+CIRCUIT_BREAKER_THRESHOLD = 8
+CIRCUIT_BREAKER_COOLDOWN_SECONDS = 30
+CIRCUIT_BREAKER_MAX_PAUSES = 5
+# Readiness probe: poll the backend with capped exponential backoff until it answers or the timeout expires
+DEFAULT_READY_TIMEOUT = 300
+READY_POLL_BASE_SECONDS = 0.25
+READY_POLL_MAX_SECONDS = 5
+# Sent once per target language before the run so every model is loaded up front
+WARM_UP_TEXT = "Hello"
+# Upper bounds (ms) of the per-request latency histogram buckets in --metrics-json
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+# Translation memory lives next to the res dir so it can be committed and reused by CI
+DEFAULT_MEMORY_FILENAME = "translation_memory.jsonl"
+# Which English source each locale value was written from, next to the translation memory (commit both)
+SOURCES_SUFFIX = ".sources.json"
+# Per-language journals of an unfinished run, also next to the res dir (not meant to be committed)
+DEFAULT_CHECKPOINT_DIRNAME = ".translation-checkpoints"
+# --verify results per locale file, keyed by content hash, also next to the res dir (not meant to be committed)
+DEFAULT_VERIFY_CACHE_FILENAME = ".translation-verify-cache.json"
+# Bumped whenever the --verify checks change, so cached results are not reused
+VERIFY_CACHE_VERSION = 1
+# --verify checks that only warn; every other check fails the run
+VERIFY_WARNINGS = {'stale', 'untranslated'}
+# Protected terms and forced translations, shipped next to this script
+DEFAULT_GLOSSARY_FILENAME = "medical_glossary.json"
+# --watch polls the source files this often, then waits for a change to settle before reading it
+WATCH_POLL_SECONDS = 1.0
+WATCH_SETTLE_SECONDS = 0.2
+# Directories --project never searches for res/values
+SKIPPED_PROJECT_DIRS = {"build", ".gradle", ".git", ".idea", ".translation-checkpoints", "node_modules"}
 
 SUPPORTED_LANGUAGES = {
     "en": "English",
@@ -42,35 +102,128 @@ SPECIAL_FORMAT_KEYS_SLASH = {
 }
 
 # Regex to find Android format specifiers
-# Handles %s, %d, %f, %% and positional variants like %1$s, %2$d
-ANDROID_PLACEHOLDER_REGEX = re.compile(r'%(\d+\$)?[sdfe%]')
+# Handles %s, %d, %f, %% and positional variants like %1$s, %2$d, with flags, width and precision (%1$.1f)
+# A space is not accepted as a flag, so prose like "100% of" is left alone
+ANDROID_PLACEHOLDER_REGEX = re.compile(r'%(\d+\$)?[-#+0,(]*\d*(?:\.\d+)?[sdfeExXoScbBgG%]')
+# An inline markup tag inside a value, such as <b>, </b> or <xliff:g id="x">
+MARKUP_TAG_REGEX = re.compile(r'</?[A-Za-z][\w:.-]*(?:\s[^<>]*)?/?>')
+# Spans the translator must never touch: format specifiers and inline markup
+PROTECTED_SPAN_REGEX = re.compile(ANDROID_PLACEHOLDER_REGEX.pattern + '|' + MARKUP_TAG_REGEX.pattern)
+# Values hold their inner XML; markup and entities are written as they are, a bare & or < is escaped
+XML_TEXT_REGEX = re.compile(MARKUP_TAG_REGEX.pattern + r'|&(?:[A-Za-z]+|#\d+|#x[0-9A-Fa-f]+);|[&<]')
+XML_TEXT_ESCAPES = {'&': '&amp;', '<': '&lt;'}
 # Regex to find our temporary internal placeholders
-INTERNAL_PLACEHOLDER_REGEX = re.compile(r'__PHMSPH(\d+)__')
+INTERNAL_PLACEHOLDER_TEMPLATE = "__PHMSPH{}__"
+# Tolerates the spacing models insert into the marker, e.g. "_ _ PHMSPH0 _ _"
+INTERNAL_PLACEHOLDER_REGEX = re.compile(r'(?:_\s?){1,2}PHMSPH\s?(\d+)(?:\s?_){0,2}')
+# Sentence boundaries where the in-process backend splits a string before decoding, like LibreTranslate does
+SENTENCE_BOUNDARY_REGEX = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'(])')
+# A masked string with no letters outside its markers needs no translation and is resolved locally
+LETTER_REGEX = re.compile(r'[^\W\d_]')
+# A markup tag or valid Android escape sequence, or a character that still needs escaping; escaping skips
+# the former, so values read back from a locale file are never escaped twice and tag attributes keep their quotes
+ANDROID_ESCAPE_REGEX = re.compile(MARKUP_TAG_REGEX.pattern + r'|\\(?:u[0-9a-fA-F]{4}|[\\\'"nt@?&<>])|[\\\'"\n\t]')
+ANDROID_ESCAPES = {'\\': '\\\\', "'": "\\'", '"': '\\"', '\n': '\\n', '\t': '\\t'}
 # Regex to detect potentially problematic placeholder text like "key_name"
 PLACEHOLDER_TEXT_REGEX = re.compile(r'^(\s*)"([a-zA-Z0-9_]+)"')
 
+class ResourceItem:
+    """The raw text and attributes of one <string> value or <item>.
+
+    `attrib` is an interned tuple of (name, value) pairs. The fingerprint keys the translation
+    memory; it is computed once per source item and reused by every target language.
+    """
+
+    __slots__ = ('text', 'attrib', '_fingerprint')
+
+    def __init__(self, text, attrib=()):
+        self.text = text
+        self.attrib = attrib
+        self._fingerprint = None
+
+    @property
+    def fingerprint(self):
+        if self._fingerprint is None:
+            self._fingerprint = hashlib.sha256(self.text.encode('utf-8')).hexdigest()
+        return self._fingerprint
+
+    def attribute(self, key, default=None):
+        return next((value for name, value in self.attrib if name == key), default)
+
+    def __eq__(self, other):
+        return isinstance(other, ResourceItem) and self.text == other.text and self.attrib == other.attrib
+
+class Resource:
+    """A <string>, <string-array> or <plurals> resource, read-only once parsed.
+
+    A string holds its value as the single entry of `items`. The parsed source resources are
+    shared by every target language of a run.
+    """
+
+    __slots__ = ('name', 'tag', 'attrib', 'items')
+
+    def __init__(self, name, tag, attrib, items):
+        self.name = name
+        self.tag = tag
+        self.attrib = attrib
+        self.items = items
+
+    @property
+    def value(self):
+        """The ResourceItem of a <string>, or None for arrays and plurals."""
+        return self.items[0] if self.tag == 'string' else None
+
+    def attribute(self, key, default=None):
+        return next((value for name, value in self.attrib if name == key), default)
+
+    def __eq__(self, other):
+        return (isinstance(other, Resource) and self.name == other.name and self.tag == other.tag
+                and self.attrib == other.attrib and self.items == other.items)
+
+# Attribute tuples are shared by every resource with the same attributes (most have none besides name)
+INTERNED_ATTRIBUTES = {}
+# {prefix: uri} of the namespaces declared by parsed resource files (e.g. xliff for <xliff:g>),
+# declared again on the <resources> element of every written file
+XML_NAMESPACES = {}
+
+def qualified_name(tag):
+    """Turns an ElementTree '{uri}local' name back into 'prefix:local' using the parsed declarations."""
+    if not tag.startswith('{'): return tag
+    uri, local = tag[1:].split('}', 1)
+    prefix = next((prefix for prefix, declared in XML_NAMESPACES.items() if declared == uri), None)
+    return f"{prefix}:{local}" if prefix else local
+
+def intern_attributes(attrib):
+    """Returns the shared tuple of an element's attributes, without its name."""
+    pairs = tuple((qualified_name(key), value) for key, value in attrib.items() if key != 'name')
+    return INTERNED_ATTRIBUTES.setdefault(pairs, pairs)
+
+def escape_markup_text(text):
+    """Escapes & and < in plain text so it can sit in a value next to markup."""
+    return text.replace('&', '&amp;').replace('<', '&lt;')
+
+def xml_text(text):
+    """Writes a value as inner XML: markup and entities are kept, a bare & or < (e.g. from a translator) is escaped."""
+    return XML_TEXT_REGEX.sub(lambda match: XML_TEXT_ESCAPES.get(match.group(0), match.group(0)), text)
+
+def inner_markup(elem):
+    """Returns the content of a <string> or <item> as XML: its text, inline markup such as <b> or <xliff:g>, and tails.
+
+    Entities in the text stay escaped, so a value written back unchanged is the same XML.
+    """
+    parts = [escape_markup_text(elem.text or "")]
+    for child in elem:
+        tag = qualified_name(child.tag)
+        attributes = ''.join(f" {qualified_name(key)}={quoteattr(value)}" for key, value in child.attrib.items())
+        content = inner_markup(child)
+        parts.append(f"<{tag}{attributes}>{content}</{tag}>" if content else f"<{tag}{attributes}/>")
+        parts.append(escape_markup_text(child.tail or ""))
+    return ''.join(parts)
+
 def extract_resources(xml_file):
-    """Extracts both <string> and <string-array> resources with attributes."""
+    """Extracts <string>, <string-array> and <plurals> resources with attributes, exiting if the file is unreadable."""
     try:
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
-        resources = {}
-        for string_elem in root.findall(".//string"):
-            name = string_elem.get('name')
-            if name:
-                resources[name] = {
-                    'value': string_elem.text if string_elem.text else "",
-                    'attrib': dict(string_elem.attrib) # Store all attributes
-                }
-        for array_elem in root.findall(".//string-array"):
-            name = array_elem.get('name')
-            if name:
-                items = [
-                    {'value': item.text if item.text else "", 'attrib': dict(item.attrib)}
-                    for item in array_elem.findall("item")
-                ]
-                resources[name] = {'items': items, 'attrib': dict(array_elem.attrib)}
-        return resources
+        return parse_resources(xml_file)
     except ET.ParseError as e:
         print(f"Error parsing XML file {xml_file}: {e}")
         sys.exit(1)
@@ -78,40 +231,723 @@ def extract_resources(xml_file):
         print(f"Error extracting resources from {xml_file}: {e}")
         sys.exit(1)
 
+def parse_resources(xml_file):
+    """Parses the <string>, <string-array> and <plurals> resources of a file into {name: Resource}; raises on errors.
+
+    The file is streamed with iterparse and each resource element is cleared once read, so only
+    the compact model is kept. Resources keep their order in the file. Values are the inner XML
+    of their element, so inline markup is kept as written.
+    """
+    resources = {}
+    depth = 0
+    root = None
+    for event, elem in ET.iterparse(xml_file, events=('start-ns', 'start', 'end')):
+        if event == 'start-ns':
+            prefix, uri = elem
+            if prefix: XML_NAMESPACES.setdefault(prefix, uri)
+            continue
+        if event == 'start':
+            if root is None: root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth != 1: continue # Only direct children of <resources>; items are read with their parent
+        name = elem.get('name')
+        if name and elem.tag == 'string':
+            resources[name] = Resource(name, 'string', intern_attributes(elem.attrib), (ResourceItem(inner_markup(elem)),))
+        elif name and elem.tag in ('string-array', 'plurals'):
+            items = tuple(ResourceItem(inner_markup(item), intern_attributes(item.attrib)) for item in elem.findall('item'))
+            resources[name] = Resource(name, elem.tag, intern_attributes(elem.attrib), items)
+        elem.clear()
+        root.clear()
+    return resources
+
+def translatable_resources(resources):
+    """Drops resources marked translatable="false", which must not appear in locale files."""
+    return {name: resource for name, resource in resources.items() if resource.attribute('translatable') != 'false'}
+
+def find_resource_files(project_dir):
+    """Finds every res/values/*.xml file with translatable resources under an Android project.
+
+    Returns one source dict per file (its path, res dir, file name and parsed resources), so each
+    file is parsed only once per run.
+    """
+    sources = []
+    for dirpath, dirnames, filenames in os.walk(project_dir):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIPPED_PROJECT_DIRS)
+        if os.path.basename(dirpath) != 'values' or os.path.basename(os.path.dirname(dirpath)) != 'res':
+            continue
+        for filename in sorted(filenames):
+            if not filename.endswith('.xml'): continue
+            path = os.path.join(dirpath, filename)
+            resources = translatable_resources(extract_resources(path))
+            if resources:
+                sources.append({'path': path, 'res_dir': os.path.dirname(dirpath), 'filename': filename, 'resources': resources})
+    return sources
+
+class RunMetrics:
+    """Thread-safe per-language and per-phase timings, counters and request latencies for one run.
+
+    Phases are recorded as spans, which --trace-json writes in Chrome trace format; --metrics-json
+    writes the aggregated report.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.spans = []
+        self.counters = defaultdict(Counter)
+        self.latencies = defaultdict(list)
+
+    @contextlib.contextmanager
+    def phase(self, name, lang=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, lang, started)
+
+    def add_span(self, name, lang, started, ended=None):
+        ended = time.perf_counter() if ended is None else ended
+        with self.lock:
+            self.spans.append((name, lang, started, ended, threading.current_thread().name))
+
+    def count(self, lang, counter, amount=1):
+        with self.lock:
+            self.counters[lang][counter] += amount
+
+    def record_request(self, lang, seconds):
+        with self.lock:
+            self.latencies[lang].append(seconds * 1000)
+
+    @staticmethod
+    def latency_summary(latencies):
+        ordered = sorted(latencies)
+        def pick(fraction):
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 2) if ordered else 0.0
+        histogram = Counter()
+        for latency in ordered:
+            bucket = next((f"<={bound}" for bound in LATENCY_BUCKETS_MS if latency <= bound), f">{LATENCY_BUCKETS_MS[-1]}")
+            histogram[bucket] += 1
+        return {
+            'count': len(ordered), 'p50': pick(0.50), 'p90': pick(0.90), 'p99': pick(0.99),
+            'max': round(ordered[-1], 2) if ordered else 0.0, 'histogram_ms': dict(histogram),
+        }
+
+    def report(self):
+        """Returns the aggregated metrics as a JSON-serializable dict."""
+        with self.lock:
+            spans = list(self.spans)
+            counters = {lang: dict(values) for lang, values in self.counters.items()}
+            latencies = {lang: list(values) for lang, values in self.latencies.items()}
+        languages = defaultdict(lambda: {'phases': {}, 'counters': {}, 'latency_ms': self.latency_summary([])})
+        phases = {}
+        for name, lang, started, ended, _ in spans:
+            for totals in (phases, languages[lang]['phases'] if lang else None):
+                if totals is None: continue
+                phase = totals.setdefault(name, {'seconds': 0.0, 'count': 0})
+                phase['seconds'] += ended - started
+                phase['count'] += 1
+        for lang, values in counters.items():
+            if lang: languages[lang]['counters'] = values
+        for lang, values in latencies.items():
+            if lang: languages[lang]['latency_ms'] = self.latency_summary(values)
+        totals = Counter()
+        for values in counters.values():
+            totals.update(values)
+        for phase_totals in [phases] + [language['phases'] for language in languages.values()]:
+            for phase in phase_totals.values():
+                phase['seconds'] = round(phase['seconds'], 4)
+        return {
+            'wall_seconds': round(time.perf_counter() - self.started, 4),
+            'phases': phases,
+            'totals': dict(totals),
+            'latency_ms': self.latency_summary([latency for values in latencies.values() for latency in values]),
+            'languages': dict(sorted(languages.items())),
+        }
+
+    def chrome_trace(self):
+        """Returns the recorded spans as a Chrome trace (chrome://tracing, Perfetto)."""
+        with self.lock:
+            spans = list(self.spans)
+        thread_ids = {}
+        events = []
+        for name, lang, started, ended, thread_name in spans:
+            tid = thread_ids.setdefault(thread_name, len(thread_ids) + 1)
+            events.append({
+                'name': name, 'cat': lang or 'run', 'ph': 'X', 'pid': 1, 'tid': tid,
+                'ts': round((started - self.started) * 1e6, 1), 'dur': round((ended - started) * 1e6, 1),
+                'args': {'lang': lang} if lang else {},
+            })
+        for thread_name, tid in thread_ids.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': thread_name}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+METRICS = RunMetrics()
+
+# Read once at startup: os.umask can only be queried by setting it, which is not thread-safe
+PROCESS_UMASK = os.umask(0o022)
+os.umask(PROCESS_UMASK)
+
+def replace_file(temp_file, target):
+    """Atomically moves a finished temp file onto `target`.
+
+    mkstemp creates files readable only by their owner, so the temp file first gets the mode of
+    the file it replaces, or the mode open() would give a new file.
+    """
+    try:
+        mode = os.stat(target).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~PROCESS_UMASK
+    os.chmod(temp_file, mode)
+    os.replace(temp_file, target)
+
+class TranslationMemory:
+    """Append-only JSONL store of translations keyed by (source hash, target language, engine).
+
+    Alongside it, the sources file records for every locale value the fingerprint of the English
+    text it was written from, so a value whose English text changed is replaced even when the new
+    text is already in the memory.
+    """
+
+    def __init__(self, path, engine):
+        self.path = path
+        self.engine = engine
+        self.entries = {}
+        self.languages = set()
+        self.sources_path = os.path.splitext(path)[0] + SOURCES_SUFFIX if path else None
+        self.sources = {}
+        self.sources_changed = False
+        # Per-language so concurrent language workers never share mutable state
+        self.pending = defaultdict(list)
+        self.hits = Counter()
+        self.misses = Counter()
+        self.seeded = Counter()
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if self.sources_path and os.path.exists(self.sources_path):
+            try:
+                with open(self.sources_path, 'r', encoding='utf-8') as f:
+                    self.sources = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not read translation sources {self.sources_path}: {e}")
+        if not self.path or not os.path.exists(self.path): return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip(): continue
+                    try:
+                        record = json.loads(line)
+                        key = (record['hash'], record['lang'], record['engine'])
+                        self.entries[key] = record['text']
+                    except (ValueError, KeyError) as e:
+                        print(f"Warning: Skipping malformed translation memory line {line_number} in {self.path}: {e}")
+                        continue
+                    if record['engine'] == self.engine:
+                        self.languages.add(record['lang'])
+        except OSError as e:
+            print(f"Warning: Could not read translation memory {self.path}: {e}")
+
+    def has_language(self, lang):
+        """True if this memory already holds translations for `lang` from the current engine."""
+        return lang in self.languages
+
+    def lookup(self, fingerprint, lang):
+        """Returns the translation of the source text with this ResourceItem fingerprint, or None."""
+        return self.entries.get((fingerprint, lang, self.engine))
+
+    def store(self, fingerprint, lang, translated_text):
+        key = (fingerprint, lang, self.engine)
+        if self.entries.get(key) == translated_text: return
+        self.entries[key] = translated_text
+        self.languages.add(lang)
+        self.pending[lang].append({'hash': key[0], 'lang': lang, 'engine': self.engine, 'text': translated_text})
+
+    def seed(self, fingerprint, lang, existing_text):
+        """Adopts a translation already on disk as the memory entry for a source fingerprint."""
+        self.seeded[lang] += 1
+        self.store(fingerprint, lang, existing_text)
+
+    def sources_key(self, locale_file):
+        # Relative to the memory, so the file can be committed and used from any checkout
+        base = os.path.dirname(os.path.abspath(self.path)) if self.path else os.getcwd()
+        return os.path.relpath(os.path.abspath(locale_file), base).replace(os.sep, '/')
+
+    def produced_from(self, locale_file):
+        """Returns {source key: fingerprint} of the English texts the values of `locale_file` were written from."""
+        return self.sources.get(self.sources_key(locale_file), {})
+
+    def record_sources(self, locale_file, fingerprints):
+        with self.lock:
+            self.sources[self.sources_key(locale_file)] = fingerprints
+            self.sources_changed = True
+
+    def flush(self, lang=None):
+        """Appends the entries recorded since the last flush (for `lang`, or all) to the JSONL file."""
+        with self.lock:
+            if self.sources_changed and self.sources_path:
+                try:
+                    fd, temp_file = tempfile.mkstemp(prefix=".sources-", suffix=".tmp", dir=os.path.dirname(os.path.abspath(self.sources_path)))
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        json.dump(self.sources, f, indent=0, sort_keys=True)
+                    replace_file(temp_file, self.sources_path)
+                    self.sources_changed = False
+                except OSError as e:
+                    print(f"Warning: Could not write translation sources {self.sources_path}: {e}")
+            langs = [lang] if lang is not None else list(self.pending)
+            records = [record for code in langs for record in self.pending.get(code, [])]
+            if not self.path or not records: return
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                for code in langs:
+                    self.pending.pop(code, None)
+            except OSError as e:
+                print(f"Warning: Could not write translation memory {self.path}: {e}")
+
+class CheckpointJournal:
+    """Per-language append-only journal of finished translations, replayed by --resume.
+
+    Each finished batch is appended and fsynced, keyed by resource name, array item index and
+    source hash, so a crash mid-language loses at most one batch. The journal is deleted once the
+    language's strings.xml has been written.
+    """
+
+    def __init__(self, path, resume):
+        self.path = path
+        self.entries = {}
+        self.file = None
+        if not os.path.exists(path): return
+        if not resume:
+            print(f"  Discarding checkpoint {path} from an interrupted run (pass --resume to reuse it)")
+            os.remove(path)
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self.entries[(record['name'], record['index'])] = (record['hash'], record['text'])
+                except (ValueError, KeyError):
+                    continue # A torn last line from the crash
+
+    def lookup(self, name, index, fingerprint):
+        """Returns the journaled translation if it was made from the same source text."""
+        entry = self.entries.get((name, index))
+        if entry and entry[0] == fingerprint:
+            return entry[1]
+        return None
+
+    def record(self, finished):
+        """Appends (unit, translated) pairs and forces them to disk."""
+        if not finished: return
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.file = open(self.path, 'a', encoding='utf-8')
+        for unit, translated in finished:
+            record = {'name': unit['name'], 'index': unit['index'], 'hash': unit['fingerprint'], 'text': translated}
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self, completed):
+        """Closes the journal, deleting it if the language finished."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if completed and os.path.exists(self.path):
+            os.remove(self.path)
+
 def load_existing_translations(file_path):
     """Loads existing translations, including attributes."""
     if not os.path.exists(file_path): return {}
-    try: return extract_resources(file_path)
+    try: return parse_resources(file_path)
     except Exception as e:
         print(f"Warning: Error loading existing translations from {file_path}: {e}")
         return {}
 
-def check_libretranslate():
-    """Checks if LibreTranslate is running and gets available languages."""
-    try:
-        response = requests.get(urljoin(LIBRETRANSLATE_URL, "/languages"), timeout=10)
+class LocaleFileCache:
+    """Parsed locale files kept between --watch cycles, re-read only when their size or mtime changes.
+
+    Files this script writes are remembered from the written entries, so they are not parsed again.
+    """
+
+    def __init__(self):
+        self.files = {}
+
+    def load(self, file_path):
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return {}
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self.files.get(file_path)
+        if cached is None or cached[0] != version:
+            cached = (version, load_existing_translations(file_path))
+            self.files[file_path] = cached
+        return cached[1]
+
+    def remember(self, file_path, entries):
+        """Records the entries just written to `file_path` as its parsed resources."""
+        version = file_version(file_path)
+        if version is None: return
+        resources = {}
+        for entry in entries:
+            if entry['type'] == 'string':
+                items = (ResourceItem(xml_text(entry['text'])),)
+            else:
+                items = tuple(ResourceItem(xml_text(item['text']), item['attrib']) for item in entry['items'])
+            resources[entry['name']] = Resource(entry['name'], entry['type'], entry['attrib'], items)
+        self.files[file_path] = (version, resources)
+
+class TranslationServiceUnavailable(Exception):
+    """Raised when the translation server stays overloaded after the circuit breaker gives up."""
+
+class TranslationError(Exception):
+    """Raised by a backend when one batch could not be translated; the batch is split and retried."""
+
+class LanguageUnavailable(Exception):
+    """Raised by a backend that cannot translate into a target language; only that language fails."""
+
+class CharacterBudget:
+    """Token bucket limiting the characters sent per second, shared by every worker of a backend.
+
+    A caller reserves its characters up front and then sleeps off any debt outside the lock, so a
+    batch larger than one second's budget still goes through, just later.
+    """
+
+    def __init__(self, chars_per_second=DEFAULT_CHARS_PER_SECOND):
+        self.rate = chars_per_second
+        self.tokens = float(chars_per_second)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, characters):
+        """Blocks until `characters` fit in the budget. Returns the seconds waited."""
+        if self.rate <= 0: return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= characters
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+class TranslationBackend:
+    """Interface of the translation engines behind translate_masked and check_libretranslate.
+
+    Subclasses set `name` (recorded in the translation memory), `description` and `setup_hint`
+    (for messages), and implement languages() and translate_texts(), holding `slots` while the
+    engine works. Callers use translate(), which applies the character budget, validates the
+    result and records the metrics every engine reports.
+    """
+
+    name = None
+    setup_hint = ""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, batch_bytes=DEFAULT_BATCH_BYTES,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, chars_per_second=DEFAULT_CHARS_PER_SECOND):
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.description = self.name
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.budget = CharacterBudget(chars_per_second)
+
+    def languages(self):
+        """Returns the available languages as {code: name}."""
+        raise NotImplementedError
+
+    def probe(self):
+        """Returns languages() with a single attempt, for the readiness poll."""
+        return self.languages()
+
+    def reset_circuit(self):
+        """Forgets earlier overload failures, so a new --watch cycle starts with a closed circuit."""
+
+    def translate_texts(self, texts, target_lang, source_lang):
+        """Returns the translations of `texts`, in order."""
+        raise NotImplementedError
+
+    def translate(self, texts, target_lang, source_lang="en"):
+        """Translates a batch of strings and returns the translated list."""
+        characters = sum(len(text) for text in texts)
+        waited = self.budget.acquire(characters)
+        if waited:
+            METRICS.count(target_lang, 'rate_limited_ms', round(waited * 1000))
+        METRICS.count(target_lang, 'strings_sent', len(texts))
+        METRICS.count(target_lang, 'characters_sent', characters)
+        translated = self.translate_texts(texts, target_lang, source_lang)
+        if not isinstance(translated, list) or len(translated) != len(texts):
+            raise ValueError(f"expected {len(texts)} translations, got {translated!r:.80}")
+        METRICS.count(target_lang, 'characters_received', sum(len(text) for text in translated if isinstance(text, str)))
+        return translated
+
+class LibreTranslateClient(TranslationBackend):
+    """Shared LibreTranslate HTTP client with connection pooling, retries and a circuit breaker."""
+
+    name = "libretranslate"
+    setup_hint = "Please ensure LibreTranslate is running (./setup_libretranslate.sh) and has had time to initialize."
+
+    def __init__(self, url=LIBRETRANSLATE_URL, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 max_retries=DEFAULT_MAX_RETRIES, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 batch_size=DEFAULT_BATCH_SIZE, batch_bytes=DEFAULT_BATCH_BYTES, chars_per_second=DEFAULT_CHARS_PER_SECOND):
+        super().__init__(batch_size, batch_bytes, max_in_flight, chars_per_second)
+        self.url = url
+        self.description = f"LibreTranslate at {url}"
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        # One keep-alive connection per in-flight slot
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.pauses = 0
+
+    def languages(self):
+        """Returns the server's available languages as {code: name}."""
+        response = self.request("GET", "/languages")
+        return {lang["code"]: lang["name"] for lang in response.json()}
+
+    def probe(self):
+        # Bypasses retries and the circuit breaker; wait_until_ready does its own polling
+        response = self.session.get(urljoin(self.url, "/languages"), timeout=self.timeout)
         response.raise_for_status()
         return {lang["code"]: lang["name"] for lang in response.json()}
-    except requests.exceptions.RequestException as e:
-        print(f"Error connecting to LibreTranslate at {LIBRETRANSLATE_URL}: {e}")
-        print("Please ensure LibreTranslate is running (./setup_libretranslate.sh) and has had time to initialize.")
-        sys.exit(1)
-    except Exception as e:
-        print(f"An unexpected error occurred while checking LibreTranslate: {e}")
-        sys.exit(1)
+
+    def translate_texts(self, texts, target_lang, source_lang):
+        """Sends one /translate request with an array `q`."""
+        data = {"q": texts, "source": source_lang, "target": target_lang, "format": "text"}
+        return self.request("POST", "/translate", lang=target_lang, json=data).json().get("translatedText")
+
+    def request(self, method, path, lang=None, **kwargs):
+        """Sends a request, retrying 429/5xx and connection errors with exponential backoff and jitter.
+
+        Overload failures are retried until the circuit breaker gives up, so they never reach the
+        caller as a per-string error. Other retryable errors raise after `max_retries`.
+        """
+        url = urljoin(self.url, path)
+        attempt = 0
+        while True:
+            self.wait_for_circuit()
+            retry_after = None
+            METRICS.count(lang, 'requests')
+            try:
+                with self.slots:
+                    started = time.perf_counter()
+                    try:
+                        response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+                    finally:
+                        METRICS.record_request(lang, time.perf_counter() - started)
+                        METRICS.add_span(f"{method} {path}", lang, started)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error, overloaded = e, True
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    self.record_success()
+                    response.raise_for_status()
+                    return response
+                error = requests.exceptions.HTTPError(f"{response.status_code} from {url}", response=response)
+                overloaded = response.status_code in OVERLOAD_STATUS_CODES
+                retry_after = response.headers.get("Retry-After")
+            METRICS.count(lang, 'failed_requests')
+            if overloaded:
+                self.record_failure()
+            elif attempt >= self.max_retries:
+                raise error
+            METRICS.count(lang, 'retries')
+            delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** min(attempt, 16)))
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            attempt += 1
+            time.sleep(delay)
+
+    def record_success(self):
+        with self.lock:
+            # The server recovered: only consecutive pauses count towards giving up
+            self.consecutive_failures = 0
+            self.pauses = 0
+
+    def reset_circuit(self):
+        with self.lock:
+            self.consecutive_failures = 0
+            self.pauses = 0
+            self.open_until = 0.0
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures < CIRCUIT_BREAKER_THRESHOLD or time.monotonic() < self.open_until:
+                return
+            self.pauses += 1
+            self.consecutive_failures = 0
+            self.open_until = time.monotonic() + CIRCUIT_BREAKER_COOLDOWN_SECONDS
+            if self.pauses <= CIRCUIT_BREAKER_MAX_PAUSES:
+                print(f"    {self.description} looks overloaded. Pausing all requests for {CIRCUIT_BREAKER_COOLDOWN_SECONDS}s ({self.pauses}/{CIRCUIT_BREAKER_MAX_PAUSES}).")
+
+    def wait_for_circuit(self):
+        """Blocks while the circuit is open; raises once the breaker has paused too many times."""
+        if self.pauses > CIRCUIT_BREAKER_MAX_PAUSES:
+            raise TranslationServiceUnavailable(f"{self.description} is still failing after {CIRCUIT_BREAKER_MAX_PAUSES} pauses")
+        delay = self.open_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+class ArgosTranslateBackend(TranslationBackend):
+    """Translates in-process with locally installed Argos Translate (CTranslate2) models.
+
+    The CTranslate2 translator and SentencePiece tokenizer of a language pair are loaded on first
+    use and stay resident. A batch is split into sentences and decoded with one translate_batch
+    call, without the JSON/HTTP round trip to a LibreTranslate container.
+    """
+
+    name = "argos"
+    setup_hint = "Install argostranslate (pip install argostranslate) and the models, e.g. argospm install translate-en_es."
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, batch_bytes=DEFAULT_BATCH_BYTES, threads=0, device="cpu",
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, chars_per_second=DEFAULT_CHARS_PER_SECOND):
+        super().__init__(batch_size, batch_bytes, max_in_flight, chars_per_second)
+        # Optional dependencies, only needed for this backend
+        import ctranslate2
+        import sentencepiece
+        import argostranslate.package
+        import argostranslate.settings
+        self.ctranslate2 = ctranslate2
+        self.sentencepiece = sentencepiece
+        self.packages = {(package.from_code, package.to_code): package for package in argostranslate.package.get_installed_packages()}
+        self.description = f"Argos Translate models in {argostranslate.settings.package_data_dir}"
+        self.threads = threads
+        self.device = device
+        self.models = {}
+        self.lock = threading.Lock()
+        self.load_locks = defaultdict(threading.Lock)
+
+    def languages(self, source_lang="en"):
+        """Returns the languages an installed model translates `source_lang` into, as {code: name}."""
+        return {
+            package.to_code: getattr(package, "to_name", None) or SUPPORTED_LANGUAGES.get(package.to_code, package.to_code)
+            for (from_code, _), package in self.packages.items() if from_code == source_lang
+        }
+
+    def model(self, source_lang, target_lang):
+        """Returns the resident (translator, tokenizer) of a language pair, loading it once."""
+        pair = (source_lang, target_lang)
+        with self.lock:
+            load_lock = self.load_locks[pair]
+        # Languages load in parallel; workers needing the same pair wait for one load
+        with load_lock:
+            if pair not in self.models:
+                package = self.packages.get(pair)
+                if package is None:
+                    raise LanguageUnavailable(f"No Argos Translate model installed for {source_lang}->{target_lang}")
+                with METRICS.phase('load_model', target_lang):
+                    package_path = str(package.package_path)
+                    translator = self.ctranslate2.Translator(
+                        os.path.join(package_path, "model"), device=self.device, inter_threads=1, intra_threads=self.threads
+                    )
+                    tokenizer = self.sentencepiece.SentencePieceProcessor(model_file=os.path.join(package_path, "sentencepiece.model"))
+                self.models[pair] = (translator, tokenizer)
+            return self.models[pair]
+
+    def translate_texts(self, texts, target_lang, source_lang):
+        translator, tokenizer = self.model(source_lang, target_lang)
+        sentences, counts = [], []
+        for text in texts:
+            parts = [part for part in SENTENCE_BOUNDARY_REGEX.split(text.strip()) if part] or [text]
+            sentences.extend(parts)
+            counts.append(len(parts))
+        METRICS.count(target_lang, 'requests')
+        with self.slots:
+            started = time.perf_counter()
+            try:
+                results = translator.translate_batch(tokenizer.encode(sentences, out_type=str), beam_size=4, replace_unknowns=True)
+            except RuntimeError as e:
+                METRICS.count(target_lang, 'failed_requests')
+                raise TranslationError(str(e)) from e
+            finally:
+                METRICS.record_request(target_lang, time.perf_counter() - started)
+                METRICS.add_span("translate_batch", target_lang, started)
+        decoded = iter(tokenizer.decode_pieces(result.hypotheses[0]) for result in results)
+        return [" ".join(next(decoded) for _ in range(count)) for count in counts]
+
+def create_backend(args):
+    """Builds the --backend translation engine from the command-line options."""
+    if args.backend == ArgosTranslateBackend.name:
+        return ArgosTranslateBackend(
+            args.batch_size, args.batch_bytes, max(0, args.threads), max_in_flight=max(1, args.max_in_flight),
+            chars_per_second=max(0, args.chars_per_second)
+        )
+    return LibreTranslateClient(
+        args.url, args.connect_timeout, args.read_timeout, args.max_retries, max(1, args.max_in_flight),
+        args.batch_size, args.batch_bytes, max(0, args.chars_per_second)
+    )
+
+def check_libretranslate(client, ready_timeout=DEFAULT_READY_TIMEOUT):
+    """Waits until the translation backend answers and gets available languages.
+
+    Polls with capped exponential backoff for up to `ready_timeout` seconds, so a server that is
+    still starting or loading models is waited for instead of failing the run.
+    """
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            return client.probe()
+        except (requests.exceptions.RequestException, TranslationServiceUnavailable, ValueError) as e:
+            error = e
+        except Exception as e:
+            print(f"An unexpected error occurred while checking {client.description}: {e}")
+            sys.exit(1)
+        remaining = ready_timeout - (time.monotonic() - started)
+        if remaining <= 0:
+            print(f"Error connecting to {client.description}: {error}")
+            print(client.setup_hint)
+            sys.exit(1)
+        if attempt == 0:
+            print(f"Waiting up to {ready_timeout:g}s for {client.description} to become ready...")
+        delay = min(READY_POLL_MAX_SECONDS, READY_POLL_BASE_SECONDS * 2 ** min(attempt, 16))
+        attempt += 1
+        time.sleep(min(remaining, random.uniform(delay / 2, delay)))
+
+def warm_up(client, languages, source_lang="en"):
+    """Sends one translation per language concurrently, so each model is loaded before the run.
+
+    Returns {lang: seconds}, or None for a language whose warm-up failed; those languages are
+    still translated, they just pay the model load on their first batch.
+    """
+    def warm(lang):
+        started = time.perf_counter()
+        try:
+            with METRICS.phase('warm_up', lang):
+                client.translate([WARM_UP_TEXT], lang, source_lang)
+        except (requests.exceptions.RequestException, TranslationError, TranslationServiceUnavailable, LanguageUnavailable, ValueError) as e:
+            print(f"  [{lang}] Warm-up failed: {e}")
+            return None
+        return time.perf_counter() - started
+
+    if not languages: return {}
+    with ThreadPoolExecutor(max_workers=len(languages)) as executor:
+        return dict(zip(languages, executor.map(warm, languages)))
 
 def escape_android_string(text):
-    """Escapes characters for Android strings.xml."""
+    """Escapes characters for Android strings.xml.
+
+    Idempotent: escape sequences already in the text (as in values read from a locale file or an
+    English source such as "Don\\'t") are kept, so escaping a kept value again changes nothing.
+    """
     if not isinstance(text, str): return ""
-    # Escape backslashes first, then other characters
-    text = text.replace('\\', '\\\\')
-    text = text.replace("'", "\\'")
-    text = text.replace('"', '\\"')
-    # Basic XML needs - often handled by XML library, but let's be safe for '&' within text
-    text = text.replace('&', '&amp;')
-    # Escape newlines and tabs
-    text = text.replace('\n', '\\n')
-    text = text.replace('\t', '\\t')
+    # Backslashes, quotes, newlines and tabs that are not part of an escape sequence
+    # Markup tags are skipped; a bare & or < is escaped by AndroidStringsWriter when the file is written
+    text = ANDROID_ESCAPE_REGEX.sub(lambda match: ANDROID_ESCAPES.get(match.group(0), match.group(0)), text)
     # Escape @ and ? at the beginning of a string
     if text.startswith('@'):
         text = '\\' + text
@@ -119,104 +955,318 @@ def escape_android_string(text):
         text = '\\' + text
     return text
 
-def translate_text(original_text, target_lang, source_lang="en"):
-    """Translates a single string, handling placeholders and attempting error correction."""
-    if not original_text or original_text.strip() == "":
-        return ""
-
-    original_placeholders = ANDROID_PLACEHOLDER_REGEX.findall(original_text)
-    original_placeholder_count = len(original_placeholders)
-
-    # If no placeholders, translate directly
-    if original_placeholder_count == 0:
-        data = {"q": original_text, "source": source_lang, "target": target_lang, "format": "text"}
-        try:
-            response = requests.post(urljoin(LIBRETRANSLATE_URL, "/translate"), json=data, timeout=20)
-            response.raise_for_status()
-            translated = response.json().get("translatedText", "")
-            # Basic check for placeholder-like text in non-placeholder strings
-            if PLACEHOLDER_TEXT_REGEX.match(translated):
-                 print(f"    Warning: Translation for non-placeholder string '{original_text[:30]}...' resulted in suspicious text: '{translated[:30]}...'. May need manual review.")
-            return escape_android_string(translated)
-        except requests.exceptions.RequestException as e:
-            print(f"    Error translating simple text: '{original_text[:30]}...' ({e})")
-            return escape_android_string(original_text) # Fallback to original
-        except Exception as e:
-            print(f"    Unexpected error during simple translation: {e}")
-            return escape_android_string(original_text)
-
-    # --- Placeholder Handling ---
-    internal_placeholder_template = "__PHMSPH{}__"
-    modified_text = original_text
-    placeholders_map = {}
-    original_specifiers_list = [match[0] for match in original_placeholders]
-
-    # Replace standard placeholders with internal ones
-    temp_marker_template = "__TEMP_MARKER_{}__"
-    current_modified_text = modified_text
-    for i in reversed(range(original_placeholder_count)):
-        spec = original_specifiers_list[i]
-        temp_marker = temp_marker_template.format(i)
-        last_occurrence_index = current_modified_text.rfind(spec)
-        if last_occurrence_index != -1:
-            internal_placeholder = internal_placeholder_template.format(i)
-            current_modified_text = current_modified_text[:last_occurrence_index] + temp_marker + current_modified_text[last_occurrence_index + len(spec):]
-            placeholders_map[internal_placeholder] = spec
+class GlossaryMatcher:
+    """Aho-Corasick automaton that finds every occurrence of many terms in one pass over a string.
+
+    Matching ignores case; `terms` must already be lowercase.
+    """
+
+    def __init__(self, terms):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for term in terms:
+            node = 0
+            for char in term:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[node][char] = child
+                node = child
+            self.output[node].append(term)
+        # Breadth-first, so a node's failure link is final before its children need it
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fail = self.fail[node]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[child] = self.goto[fail].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def finditer(self, text):
+        """Yields (start, end, term) for every occurrence, overlapping ones included."""
+        node = 0
+        for position, char in enumerate(text):
+            char = char.lower() if len(char.lower()) == 1 else char # Keep positions aligned with `text`
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            for term in self.output[node]:
+                yield position + 1 - len(term), position + 1, term
+
+class Glossary:
+    """Terms the translator must not touch: protected terms and forced per-language translations.
+
+    The JSON file holds {"protected": [terms kept verbatim], "translations": {term: {lang: text}}}.
+    A forced term is only protected for languages it has a translation for.
+    """
+
+    def __init__(self, protected=(), translations=None):
+        self.entries = {term.lower(): {} for term in protected}
+        for term, by_language in (translations or {}).items():
+            self.entries[term.lower()] = dict(by_language)
+        self.matcher = GlossaryMatcher(self.entries) if self.entries else None
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('protected', []), data.get('translations', {}))
+
+    def __bool__(self):
+        return self.matcher is not None
+
+    def matches(self, text, lang_code=None):
+        """Returns the non-overlapping (start, end, replacement) glossary spans in `text`, leftmost-longest.
+
+        Only whole words match. The replacement is the source text for a protected term, or the
+        forced translation, capitalized like the source.
+        """
+        if self.matcher is None: return []
+        found = sorted(self.matcher.finditer(text), key=lambda match: (match[0], match[0] - match[1]))
+        spans = []
+        last_end = 0
+        for start, end, term in found:
+            if start < last_end: continue
+            if (start > 0 and (text[start - 1].isalnum() or text[start - 1] == '_')) or (end < len(text) and (text[end].isalnum() or text[end] == '_')):
+                continue
+            by_language = self.entries[term]
+            if not by_language:
+                replacement = text[start:end]
+            elif lang_code in by_language:
+                replacement = by_language[lang_code]
+                if text[start].isupper():
+                    replacement = replacement[:1].upper() + replacement[1:]
+            else:
+                continue # No forced translation for this language; let the translator handle it
+            spans.append((start, end, replacement))
+            last_end = end
+        return spans
+
+GLOSSARY = Glossary()
+
+def set_glossary(glossary):
+    """Installs the glossary used when compiling translation templates."""
+    global GLOSSARY
+    GLOSSARY = glossary
+    compile_template.cache_clear()
+
+def format_signature(text):
+    """Returns the sorted (argument index, conversion) pairs of the format specifiers in `text`.
+
+    Non-positional specifiers get the implicit sequential index Java's Formatter assigns them, so
+    "%s %d" and "%2$d %1$s" have the same signature. Literal %% is not an argument.
+    """
+    signature = []
+    sequential = 0
+    for match in ANDROID_PLACEHOLDER_REGEX.finditer(text):
+        conversion = match.group(0)[-1]
+        if conversion == '%': continue
+        if match.group(1):
+            index = int(match.group(1)[:-1])
         else:
-             print(f"    Warning: Specifier '{spec}' not found for replacement in '{original_text[:50]}...'")
-
-    text_to_translate = current_modified_text
-    for i in reversed(range(original_placeholder_count)):
-         internal_placeholder = internal_placeholder_template.format(i)
-         temp_marker = temp_marker_template.format(i)
-         text_to_translate = text_to_translate.replace(temp_marker, internal_placeholder)
-
-    # Translate text containing internal placeholders
-    data = {"q": text_to_translate, "source": source_lang, "target": target_lang, "format": "text"}
+            sequential += 1
+            index = sequential
+        signature.append((index, conversion))
+    return tuple(sorted(signature))
+
+class TranslationTemplate:
+    """A source string tokenized once into text to translate and protected spans.
+
+    Protected spans are format specifiers, markup and glossary terms. A template is reused for
+    every string with the same source and target language; `masked` is what the translator sees
+    and `restore` rebuilds a translation in a single pass over it.
+    """
+
+    __slots__ = ('source', 'masked', 'spans', 'specifiers', 'positional', 'signature')
+
+    def __init__(self, source, lang_code=None):
+        self.source = source
+        protected = [(match.start(), match.end(), match.group(0)) for match in PROTECTED_SPAN_REGEX.finditer(source)]
+        if GLOSSARY:
+            # Specifiers and markup win over glossary terms that overlap them
+            taken = protected
+            protected = sorted(protected + [
+                span for span in GLOSSARY.matches(source, lang_code)
+                if not any(span[0] < end and start < span[1] for start, end, _ in taken)
+            ])
+        parts = []
+        spans = []
+        arguments = [] # Format arguments in source order (excluding %%, markup and glossary terms)
+        last = 0
+        for start, end, replacement in protected:
+            if replacement != source[start:end]:
+                replacement = escape_markup_text(replacement) # A forced glossary translation is plain text
+            parts.append(html.unescape(source[last:start])) # The translator sees plain text, not entities
+            parts.append(INTERNAL_PLACEHOLDER_TEMPLATE.format(len(spans)))
+            if replacement.startswith('%') and replacement != '%%' and ANDROID_PLACEHOLDER_REGEX.fullmatch(source, start, end):
+                arguments.append(len(spans))
+            spans.append(replacement)
+            last = end
+        parts.append(html.unescape(source[last:]))
+        self.masked = ''.join(parts)
+        self.spans = tuple(spans)
+        # e.g. ('%1$d', '%2$d')
+        self.specifiers = tuple(spans[i] for i in arguments)
+        # Explicit positional forms of sequential specifiers ('%s' -> '%1$s'), used if a translation reorders them
+        self.positional = {}
+        if not any(ANDROID_PLACEHOLDER_REGEX.match(spans[i]).group(1) for i in arguments):
+            self.positional = {i: f"%{argument}${spans[i][1:]}" for argument, i in enumerate(arguments, 1)}
+        self.signature = format_signature(source)
+
+    def restore(self, translated):
+        """Puts the protected spans back into `translated` in one pass.
+
+        Returns None if any span was lost or duplicated. If the translation moved sequential
+        specifiers such as "%s ... %d" around, they are written in positional form so each one
+        still binds to its original argument. The translated text is escaped back to XML, after
+        decoding any entities the translator returned (e.g. &quot;).
+        """
+        if not self.spans:
+            return escape_markup_text(html.unescape(translated))
+        pieces = []
+        order = []
+        last = 0
+        for match in INTERNAL_PLACEHOLDER_REGEX.finditer(translated):
+            index = int(match.group(1))
+            if index >= len(self.spans): continue
+            pieces.append(escape_markup_text(html.unescape(translated[last:match.start()])))
+            pieces.append(index)
+            order.append(index)
+            last = match.end()
+        pieces.append(escape_markup_text(html.unescape(translated[last:])))
+        if sorted(order) != list(range(len(self.spans))):
+            return None
+        spans = self.spans
+        moved = [index for index in order if index in self.positional]
+        if moved != sorted(moved):
+            spans = [self.positional.get(i, span) for i, span in enumerate(self.spans)]
+        return ''.join(spans[piece] if isinstance(piece, int) else piece for piece in pieces)
+
+@lru_cache(maxsize=None)
+def compile_template(source_text, lang_code=None):
+    """Returns the cached TranslationTemplate for `source_text` and target language.
+
+    Without `lang_code`, only specifiers, markup and protected glossary terms are masked.
+    """
+    return TranslationTemplate(source_text, lang_code)
+
+def needs_translation(masked_text):
+    """False if a masked string is only protected spans, digits and punctuation."""
+    return LETTER_REGEX.search(INTERNAL_PLACEHOLDER_REGEX.sub('', masked_text)) is not None
+
+def restore_placeholders(template, translated_with_internal):
+    """Restores the protected spans in a translation. Returns None if any were lost."""
+    original_text = template.source
+    if not template.spans:
+        # Basic check for placeholder-like text in non-placeholder strings
+        if PLACEHOLDER_TEXT_REGEX.match(translated_with_internal):
+            print(f"    Warning: Translation for non-placeholder string '{original_text[:30]}...' resulted in suspicious text: '{translated_with_internal[:30]}...'. May need manual review.")
+        return template.restore(translated_with_internal)
+
+    restored_translation = template.restore(translated_with_internal)
+
+    # --- Validation and Fallback ---
+    if restored_translation is None or format_signature(restored_translation) != template.signature:
+        print(f"    Warning: Placeholder mismatch for '{original_text[:30]}...' (Expected {len(template.spans)} protected spans in '{translated_with_internal[:50]}...'). Keeping original English.")
+        return None
+    return restored_translation
+
+def chunk_batches(texts, max_items, max_bytes):
+    """Splits (index, text) pairs into chunks bounded by item count and UTF-8 payload size."""
+    chunk, chunk_bytes = [], 0
+    for index, text in texts:
+        size = len(text.encode('utf-8'))
+        if chunk and (len(chunk) >= max_items or chunk_bytes + size > max_bytes):
+            yield chunk
+            chunk, chunk_bytes = [], 0
+        chunk.append((index, text))
+        chunk_bytes += size
+    if chunk:
+        yield chunk
+
+def translate_chunk(client, chunk, target_lang, source_lang, results):
+    """Translates one chunk into `results`, splitting it in half and retrying on failure."""
     try:
-        response = requests.post(urljoin(LIBRETRANSLATE_URL, "/translate"), json=data, timeout=20)
-        response.raise_for_status()
-        translated_with_internal = response.json().get("translatedText", "")
-
-        # Restore original Android placeholders
-        restored_translation = translated_with_internal
-        found_internal_placeholders = INTERNAL_PLACEHOLDER_REGEX.findall(restored_translation)
-        mapped_placeholders_sorted = sorted(placeholders_map.keys(), key=lambda x: int(re.search(r'\d+', x).group()), reverse=True)
-
-        for internal_placeholder in mapped_placeholders_sorted:
-            original_spec = placeholders_map[internal_placeholder]
-            # Use regex for precise replacement
-            restored_translation = re.sub(re.escape(internal_placeholder), lambda _: original_spec, restored_translation, count=1)
-
-        # --- Validation and Fallback ---
-        final_placeholders = ANDROID_PLACEHOLDER_REGEX.findall(restored_translation)
-        if len(final_placeholders) != original_placeholder_count:
-            print(f"    Warning: Placeholder count mismatch for '{original_text[:30]}...' (Expected {original_placeholder_count}, Got {len(final_placeholders)} in '{restored_translation[:50]}...'). Falling back to original English.")
-            return escape_android_string(original_text) # Fallback to original
-
-        return escape_android_string(restored_translation)
-
-    except requests.exceptions.RequestException as e:
-        print(f"    Error translating placeholder text: '{original_text[:30]}...' ({e})")
-        return escape_android_string(original_text) # Fallback to original
-    except Exception as e:
-        print(f"    Unexpected error during placeholder translation: {e}")
-        return escape_android_string(original_text) # Fallback to original
+        translated = client.translate([text for _, text in chunk], target_lang, source_lang)
+    except (requests.exceptions.RequestException, TranslationError, ValueError) as e:
+        if len(chunk) == 1:
+            print(f"    Error translating text: '{chunk[0][1][:30]}...' ({e})")
+            return
+        middle = len(chunk) // 2
+        print(f"    Batch of {len(chunk)} failed ({e}). Retrying as {middle} + {len(chunk) - middle}.")
+        translate_chunk(client, chunk[:middle], target_lang, source_lang, results)
+        translate_chunk(client, chunk[middle:], target_lang, source_lang, results)
+        return
+    for (index, _), text in zip(chunk, translated):
+        results[index] = text
+
+def translate_masked(client, masked_texts, target_lang, source_lang="en"):
+    """Translates already-masked strings in batches of the backend's size.
+
+    Returns a list parallel to `masked_texts` holding the raw translation, or None where
+    translation failed. If the server becomes unavailable, the TranslationServiceUnavailable
+    raised carries the results finished so far in its `partial` attribute.
+    """
+    translated = {}
+    to_send = []
+    for index, text in enumerate(masked_texts):
+        if needs_translation(text):
+            to_send.append((index, text))
+        else:
+            translated[index] = text # Glossary terms and specifiers only: nothing to send
+    if len(to_send) < len(masked_texts):
+        METRICS.count(target_lang, 'resolved_locally', len(masked_texts) - len(to_send))
+    try:
+        for chunk in chunk_batches(to_send, client.batch_size, client.batch_bytes):
+            translate_chunk(client, chunk, target_lang, source_lang, translated)
+    except TranslationServiceUnavailable as e:
+        e.partial = [translated.get(index) for index in range(len(masked_texts))]
+        raise
+    return [translated.get(index) for index in range(len(masked_texts))]
+
+def restore_translation(original_text, translated_with_internal, lang_code=None):
+    """Restores protected spans in a raw translation and escapes it. Returns None if it is unusable."""
+    if not isinstance(translated_with_internal, str): return None
+    restored = restore_placeholders(compile_template(original_text, lang_code), translated_with_internal)
+    return escape_android_string(restored) if restored is not None else None
+
+def group_duplicates(pending, lang_code=None):
+    """Groups pending units whose masked text is identical, in order of first occurrence.
+
+    Units with the same text and protected-span layout need only one translation per language;
+    each unit then restores its own specifiers into the shared result.
+    """
+    groups = {}
+    for unit in pending:
+        groups.setdefault(compile_template(unit['value'], lang_code).masked, []).append(unit)
+    return list(groups.items())
 
 def correct_special_format(name, translated_text, original_text):
     """Applies specific format corrections for known problematic keys."""
     if name not in SPECIAL_FORMAT_KEYS_SLASH:
         return translated_text # No correction needed for this key
+    with METRICS.phase('correct_special_format'):
+        return apply_slash_format(name, translated_text, original_text)
 
+def apply_slash_format(name, translated_text, original_text):
+    """Rebuilds '<translated prefix> %1$d/%2$d' for a key in SPECIAL_FORMAT_KEYS_SLASH."""
     # Find all original placeholders to ensure they are preserved
-    original_placeholders = ANDROID_PLACEHOLDER_REGEX.findall(original_text)
-    if len(original_placeholders) != 2: # Expecting two placeholders for these keys
-        print(f"    Warning: Expected 2 placeholders for '{name}', found {len(original_placeholders)}. Skipping special correction.")
+    original_specifiers = compile_template(original_text).specifiers
+    if len(original_specifiers) != 2: # Expecting two placeholders for these keys
+        print(f"    Warning: Expected 2 placeholders for '{name}', found {len(original_specifiers)}. Skipping special correction.")
         return translated_text
 
     # Extract the actual specifiers (like %1$d, %2$d)
-    spec1 = original_placeholders[0][0]
-    spec2 = original_placeholders[1][0]
+    spec1, spec2 = original_specifiers
+    if f"{spec1}/{spec2}" in translated_text:
+        return translated_text # Came back intact, e.g. because a glossary protected the unit after it
 
     # Attempt to extract the translated prefix robustly
     # Find the first placeholder in the translated text
@@ -236,153 +1286,715 @@ def correct_special_format(name, translated_text, original_text):
     print(f"    Correction Applied for '{name}': '{translated_text}' -> '{corrected_format}'")
     return corrected_format
 
-def generate_xml(source_resources, existing_resources, lang_dir, lang_code):
-    """Generates the translated strings.xml file."""
-    output_file = os.path.join(lang_dir, "strings.xml")
-
-    root = ET.Element("resources")
-    comment = ET.Comment(f" Translated by script - {SUPPORTED_LANGUAGES.get(lang_code, lang_code)} ")
-    root.append(comment)
-
-    processed_names = set()
+def finalize_translation(name, index, translated, original_value):
+    """Applies key-specific corrections to a translated value."""
+    if index is None:
+        translated = correct_special_format(name, translated, original_value)
+    return translated
+
+def source_key(name, index):
+    """The key of a string (index None) or array/plurals item in the translation sources file."""
+    return name if index is None else f"{name}[{index}]"
+
+def is_outdated(source_item, existing_value, produced_from):
+    """True if the existing value was written from another English text than the current one."""
+    return existing_value is not None and produced_from is not None and produced_from != source_item.fingerprint
+
+def is_adoptable(original_value, existing_value, lang_code):
+    """True if an existing translation is fit to seed the memory.
+
+    Values damaged by earlier runs (internal placeholder markers left in, format specifiers lost or
+    changed) and English fallbacks are translated again instead of being adopted for good.
+    """
+    if INTERNAL_PLACEHOLDER_REGEX.search(existing_value):
+        return False
+    if format_signature(existing_value) != format_signature(original_value):
+        return False
+    return existing_value != original_value or not needs_translation(compile_template(original_value, lang_code).masked)
+
+def classify_value(source_item, existing_value, lang_code, memory, seed_memory, produced_from=None):
+    """Returns how a source ResourceItem will be resolved: 'empty', 'cached', 'seed' or 'translate'.
+
+    Only 'translate' (a translation memory miss) reaches the network. When `seed_memory` is set
+    (the memory has nothing for this language yet), valid existing translations are adopted instead.
+    `produced_from` is the fingerprint the existing value was written from; an outdated value is
+    never kept or adopted.
+    """
+    if is_outdated(source_item, existing_value, produced_from):
+        existing_value = None
+    if not source_item.text or source_item.text.strip() == "":
+        return 'empty'
+    if memory.lookup(source_item.fingerprint, lang_code) is not None:
+        return 'cached'
+    if existing_value is not None and seed_memory and is_adoptable(source_item.text, existing_value, lang_code):
+        return 'seed'
+    return 'translate'
+
+def assign_translation(slot, name, index, source_item, existing_value, lang_code, memory, seed_memory, pending, produced_from=None):
+    """Fills `slot['text']` from the translation memory, or queues it in `pending` for batched translation.
+
+    `slot['source']` records the fingerprint of the English text the value is written from.
+    """
+    action = classify_value(source_item, existing_value, lang_code, memory, seed_memory, produced_from)
+    if is_outdated(source_item, existing_value, produced_from):
+        existing_value = None # The English text changed since; write its memory translation instead
+    slot['source'] = source_item.fingerprint
+    if action == 'empty':
+        slot['text'] = ""
+        return
+    if action == 'cached':
+        cached = memory.lookup(source_item.fingerprint, lang_code)
+        memory.hits[lang_code] += 1
+        if existing_value is not None:
+            # Keep existing, but ensure proper escaping
+            slot['text'] = escape_android_string(existing_value)
+        else:
+            slot['text'] = finalize_translation(name, index, cached, source_item.text)
+        return
+    if action == 'seed':
+        memory.seed(source_item.fingerprint, lang_code, existing_value)
+        slot['text'] = escape_android_string(existing_value)
+        return
+    memory.misses[lang_code] += 1
+    pending.append({'name': name, 'index': index, 'value': source_item.text, 'fingerprint': source_item.fingerprint, 'slot': slot})
+
+def translate_pending(client, pending, lang_code, memory, journal=None, stop=None):
+    """Translates queued entries in batches, filling their slots and recording them in memory.
+
+    Duplicate source strings are translated once and fanned out to every entry that uses them.
+    Each finished batch is also appended to the checkpoint `journal`. Yields after each batch so
+    the caller can write out the entries that are now complete. Raises KeyboardInterrupt before
+    the next batch once the `stop` event is set.
+    """
+    if not pending: return
+    # Longest first: similar lengths share a batch, so short strings don't wait on padding for long ones
+    groups = sorted(group_duplicates(pending, lang_code), key=lambda group: len(group[0]), reverse=True)
+    METRICS.count(lang_code, 'pending_strings', len(pending))
+    METRICS.count(lang_code, 'unique_strings', len(groups))
+    print(f"  [{lang_code}] Translating {len(pending)} strings as {len(groups)} unique texts "
+          f"(dedup ratio {1 - len(groups) / len(pending):.1%}) in batches of up to {client.batch_size}...")
+    for start in range(0, len(groups), client.batch_size):
+        if stop is not None and stop.is_set():
+            raise KeyboardInterrupt # Ctrl-C in the main thread; finished batches stay in the journal
+        batch = groups[start:start + client.batch_size]
+        try:
+            with METRICS.phase('translate', lang_code):
+                raw = translate_masked(client, [masked for masked, _ in batch], lang_code)
+            unavailable = None
+        except TranslationServiceUnavailable as e:
+            raw = e.partial
+            unavailable = e
+        postprocess_started = time.perf_counter()
+        results = [
+            (unit, restore_translation(unit['value'], translated_with_internal, lang_code))
+            for (_, units), translated_with_internal in zip(batch, raw)
+            for unit in units
+        ]
+        successful = [(unit, translated) for unit, translated in results if translated is not None]
+        for unit, translated in successful:
+            memory.store(unit['fingerprint'], lang_code, translated)
+        if journal is not None:
+            journal.record(successful)
+        if unavailable is not None:
+            # What was finished is kept above, so the next run doesn't pay for it again
+            raise unavailable
+        for unit, translated in results:
+            if translated is None:
+                # Don't remember failures, so the next run retries them
+                translated = escape_android_string(unit['value'])
+                unit['slot']['source'] = None # Not a translation of the source; retried next run
+                METRICS.count(lang_code, 'fallbacks_to_english')
+            unit['slot']['text'] = finalize_translation(unit['name'], unit['index'], translated, unit['value'])
+        METRICS.add_span('postprocess', lang_code, postprocess_started)
+        yield
+
+class AndroidStringsWriter:
+    """Streams a strings.xml file to a temp file that atomically replaces the target on commit."""
+
+    def __init__(self, output_file, comment):
+        self.output_file = output_file
+        output_dir = os.path.dirname(output_file)
+        self.created_dir = None if os.path.isdir(output_dir) else output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        # Hidden temp file in the same directory, so the rename is atomic and aapt ignores leftovers
+        prefix = f".{os.path.splitext(os.path.basename(output_file))[0]}-"
+        for stale_file in glob.glob(os.path.join(glob.escape(output_dir), f"{prefix}*.xml.tmp")):
+            os.remove(stale_file) # Left behind by a run that was killed mid-write
+        fd, self.temp_file = tempfile.mkstemp(prefix=prefix, suffix=".xml.tmp", dir=output_dir)
+        self.file = os.fdopen(fd, 'w', encoding='utf-8', newline='\n')
+        namespaces = ''.join(f" xmlns:{prefix}={quoteattr(uri)}" for prefix, uri in XML_NAMESPACES.items())
+        self.file.write(f'<?xml version="1.0" encoding="utf-8"?>\n<resources{namespaces}>\n')
+        self.file.write(f"    <!--{comment}-->\n")
+
+    @staticmethod
+    def attributes(name, attrib):
+        """Renders the name (always first) and the interned attribute pairs of an element."""
+        attributes = f" name={quoteattr(name)}" if name is not None else ""
+        return attributes + ''.join(f" {k}={quoteattr(v)}" for k, v in attrib)
+
+    def element(self, tag, name, attrib, text, indent):
+        attributes = self.attributes(name, attrib)
+        if not text:
+            return f"{indent}<{tag}{attributes}/>\n"
+        return f"{indent}<{tag}{attributes}>{xml_text(text)}</{tag}>\n"
+
+    def write_entry(self, entry):
+        """Writes one <string>, <string-array> or <plurals> entry."""
+        if entry['type'] == 'string':
+            self.file.write(self.element('string', entry['name'], entry['attrib'], entry['text'], "    "))
+            return
+        self.file.write(f"    <{entry['type']}{self.attributes(entry['name'], entry['attrib'])}>\n")
+        for item in entry['items']:
+            self.file.write(self.element('item', None, item['attrib'], item['text'], "        "))
+        self.file.write(f"    </{entry['type']}>\n")
+
+    def commit(self):
+        """Finishes the document and atomically moves it into place."""
+        self.file.write("\n</resources>")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        replace_file(self.temp_file, self.output_file)
+
+    def abort(self):
+        """Discards the partial document, leaving any previous file intact and no new empty directory."""
+        self.file.close()
+        if os.path.exists(self.temp_file):
+            os.remove(self.temp_file)
+        if self.created_dir and not os.listdir(self.created_dir):
+            os.rmdir(self.created_dir)
+
+def entry_ready(entry):
+    if entry['type'] == 'string':
+        return entry['text'] is not None
+    return all(item['text'] is not None for item in entry['items'])
+
+def write_ready_entries(writer, entries, cursor):
+    """Writes entries from `cursor` on until one is still waiting for a translation."""
+    while cursor < len(entries) and entry_ready(entries[cursor]):
+        writer.write_entry(entries[cursor])
+        cursor += 1
+    return cursor
+
+def replay_checkpoint(journal, pending, lang_code, memory):
+    """Fills pending entries that an interrupted run already translated. Returns the rest."""
+    remaining = []
+    for unit in pending:
+        translated = journal.lookup(unit['name'], unit['index'], unit['fingerprint'])
+        if translated is None:
+            remaining.append(unit)
+            continue
+        memory.store(unit['fingerprint'], lang_code, translated)
+        unit['slot']['text'] = finalize_translation(unit['name'], unit['index'], translated, unit['value'])
+    if len(remaining) < len(pending):
+        print(f"  [{lang_code}] Resumed {len(pending) - len(remaining)} translations from checkpoint {journal.path}")
+    return remaining
+
+def pair_items(source, existing):
+    """Returns the (source item, existing item) pairs of an array or plurals resource.
+
+    Array items pair by position. Plural items pair by quantity; quantities only the locale file
+    has (e.g. "few" in Russian) come after the source ones, with no source item.
+    """
+    source_items = source.items if source is not None and source.tag != 'string' else ()
+    existing_items = existing.items if existing is not None and existing.tag != 'string' else ()
+    if (source or existing).tag != 'plurals':
+        return [
+            (source_items[i] if i < len(source_items) else None, existing_items[i] if i < len(existing_items) else None)
+            for i in range(max(len(source_items), len(existing_items)))
+        ]
+    existing_by_quantity = {item.attribute('quantity'): item for item in existing_items}
+    pairs = [(item, existing_by_quantity.pop(item.attribute('quantity'), None)) for item in source_items]
+    return pairs + [(None, item) for item in existing_items if item.attribute('quantity') in existing_by_quantity]
+
+def build_entries(source_resources, existing_resources, lang_code, memory, seed_memory, pending, produced_from=None):
+    """Builds the output entries of one resource file in file order, queueing memory misses in `pending`.
+
+    Entries share the name and interned attributes of the parsed resources, which are never copied
+    or modified. An entry or item whose 'text' is None is waiting for translation. `produced_from`
+    maps source keys to the fingerprints the existing values were written from.
+    """
+    entries = []
+    produced_from = produced_from or {}
 
     # Prioritize existing keys to maintain order and attributes
-    for name, existing_data in existing_resources.items():
-        processed_names.add(name)
-        source_data = source_resources.get(name)
-        element_type = 'string' if 'value' in existing_data else 'string-array' if 'items' in existing_data else None
-
-        if element_type == 'string':
-            string_elem = ET.SubElement(root, element_type)
-            # Restore attributes, ensuring 'name' is present
-            current_attribs = copy.deepcopy(existing_data.get('attrib', {}))
-            current_attribs['name'] = name # Ensure name is always there
-            for k, v in current_attribs.items():
-                string_elem.set(k, v)
-
-            original_value = source_data.get('value') if source_data else None
-            existing_value = existing_data.get('value')
-
-            # Translate if source exists and differs from existing, or if it's a new source entry for an existing name
-            should_translate = source_data and (original_value != existing_value)
-
-            if should_translate:
-                translated = translate_text(original_value, lang_code)
-                corrected = correct_special_format(name, translated, original_value)
-                # Final cleanup for escaped quotes that might come from translator
-                final_text = corrected.replace('&quot;', '\\"')
-                string_elem.text = final_text
-            else:
-                 # Keep existing, but ensure proper escaping
-                 string_elem.text = escape_android_string(existing_value)
-
-        elif element_type == 'string-array':
-            array_elem = ET.SubElement(root, element_type)
-            current_attribs = copy.deepcopy(existing_data.get('attrib', {}))
-            current_attribs['name'] = name
-            for k, v in current_attribs.items():
-                array_elem.set(k, v)
-
-            source_items = source_data.get('items', []) if source_data else []
-            existing_items = existing_data.get('items', [])
+    for name, existing in existing_resources.items():
+        source = source_resources.get(name)
 
-            max_len = max(len(source_items), len(existing_items))
-            for i in range(max_len):
-                 item_elem = ET.SubElement(array_elem, "item")
-                 existing_item_data = existing_items[i] if i < len(existing_items) else None
-                 source_item_data = source_items[i] if i < len(source_items) else None
+        if existing.tag == 'string':
+            entry = {'type': 'string', 'name': name, 'attrib': existing.attrib, 'text': None}
+            existing_value = existing.value.text
 
-                 # Restore attributes
-                 item_attribs = existing_item_data.get('attrib', {}) if existing_item_data else {}
-                 for k, v in item_attribs.items():
-                      item_elem.set(k,v)
-
-                 original_item_value = source_item_data.get('value') if source_item_data else None
-                 existing_item_value = existing_item_data.get('value') if existing_item_data else None
-
-                 should_translate_item = source_item_data and (original_item_value != existing_item_value)
-
-                 if should_translate_item:
-                     item_elem.text = translate_text(original_item_value, lang_code).replace('&quot;', '\\"')
-                 else:
-                     # Keep existing, but ensure proper escaping
-                     item_elem.text = escape_android_string(existing_item_value)
+            # Translate only if the English source changed since it was last translated
+            if source is not None and source.tag == 'string':
+                assign_translation(entry, name, None, source.value, existing_value, lang_code, memory, seed_memory, pending, produced_from.get(name))
+            else:
+                # Keep existing, but ensure proper escaping
+                entry['text'] = escape_android_string(existing_value)
+            entries.append(entry)
+            continue
+
+        items = []
+        for i, (source_item, existing_item) in enumerate(pair_items(source, existing)):
+            item = {'attrib': existing_item.attrib if existing_item is not None else source_item.attrib, 'text': None}
+            existing_item_value = existing_item.text if existing_item is not None else None
+            if source_item is not None:
+                assign_translation(item, name, i, source_item, existing_item_value, lang_code, memory, seed_memory, pending, produced_from.get(source_key(name, i)))
+            else:
+                # Keep existing, but ensure proper escaping
+                item['text'] = escape_android_string(existing_item_value)
+            items.append(item)
+        entries.append({'type': existing.tag, 'name': name, 'attrib': existing.attrib, 'items': items})
 
     # Add new keys from source
-    for name, source_data in source_resources.items():
-        if name not in processed_names:
-            element_type = 'string' if 'value' in source_data else 'string-array' if 'items' in source_data else None
-            if element_type == 'string':
-                 string_elem = ET.SubElement(root, element_type)
-                 current_attribs = copy.deepcopy(source_data.get('attrib', {}))
-                 current_attribs['name'] = name
-                 for k, v in current_attribs.items():
-                     string_elem.set(k, v)
-                 original_value = source_data.get('value')
-                 translated = translate_text(original_value, lang_code)
-                 corrected = correct_special_format(name, translated, original_value)
-                 final_text = corrected.replace('&quot;', '\\"')
-                 string_elem.text = final_text
-
-            elif element_type == 'string-array':
-                 array_elem = ET.SubElement(root, element_type)
-                 current_attribs = copy.deepcopy(source_data.get('attrib', {}))
-                 current_attribs['name'] = name
-                 for k, v in current_attribs.items():
-                     array_elem.set(k, v)
-                 for item_data in source_data.get('items', []):
-                     item_elem = ET.SubElement(array_elem, "item")
-                     item_attribs = item_data.get('attrib', {})
-                     for k, v in item_attribs.items():
-                          item_elem.set(k,v)
-                     item_elem.text = translate_text(item_data.get('value', ""), lang_code).replace('&quot;', '\\"')
-
-
-    # --- Write XML ---
-    os.makedirs(lang_dir, exist_ok=True)
+    for name, source in source_resources.items():
+        if name in existing_resources: continue
+        if source.tag == 'string':
+            entry = {'type': 'string', 'name': name, 'attrib': source.attrib, 'text': None}
+            assign_translation(entry, name, None, source.value, None, lang_code, memory, seed_memory, pending)
+            entries.append(entry)
+            continue
+        items = []
+        for i, source_item in enumerate(source.items):
+            item = {'attrib': source_item.attrib, 'text': None}
+            assign_translation(item, name, i, source_item, None, lang_code, memory, seed_memory, pending)
+            items.append(item)
+        entries.append({'type': source.tag, 'name': name, 'attrib': source.attrib, 'items': items})
+    return entries
+
+def entry_sources(entries):
+    """Returns {source key: fingerprint} of the entries written from an English source."""
+    sources = {}
+    for entry in entries:
+        if entry['type'] == 'string':
+            if entry.get('source'): sources[entry['name']] = entry['source']
+            continue
+        for index, item in enumerate(entry['items']):
+            if item.get('source'): sources[source_key(entry['name'], index)] = item['source']
+    return sources
+
+def generate_xml(client, outputs, pending, lang_code, memory, journal=None, stop=None):
+    """Generates the translated resource files of one language.
+
+    `outputs` holds (output file, entries) pairs whose missing translations are all queued in
+    `pending`. Entries are streamed to temp files as their translations complete, and each file
+    replaces its target only once all are complete. Returns the written files, or None on an I/O
+    error. Raises TranslationServiceUnavailable, without touching the existing files, if the
+    server stops answering; finished batches stay in the checkpoint `journal` for --resume.
+    """
+    comment = f" Translated by script - {SUPPORTED_LANGUAGES.get(lang_code, lang_code)} "
+    writers = []
     try:
-        # Use ElementTree to write, which handles basic XML entities but not Android specifics
-        tree = ET.ElementTree(root)
-        # Write to a temporary string first to replace escaped characters
-        # ET automatically escapes &, <, > but we need specific handling for ' and "
-        xml_string_bytes = ET.tostring(root, encoding='utf-8', method='xml')
-        xml_string = xml_string_bytes.decode('utf-8')
-
-        # Use minidom for pretty printing (optional, but nice)
-        try:
-            reparsed = minidom.parseString(xml_string)
-            pretty_xml = reparsed.toprettyxml(indent="    ", encoding='utf-8').decode('utf-8')
-
-            # Clean up extra newlines potentially added by minidom
-            cleaned_lines = [line for line in pretty_xml.split('\n') if line.strip()]
-            final_xml_lines = []
-            if cleaned_lines and cleaned_lines[0].startswith("<?xml"):
-                final_xml_lines.append(cleaned_lines[0])
-                final_xml_lines.extend(cleaned_lines[1:])
-            else:
-                final_xml_lines.extend(cleaned_lines)
-
-            if len(final_xml_lines) > 1 and final_xml_lines[-1].strip() == "</resources>":
-                final_xml_lines.insert(len(final_xml_lines) - 1, "") # Add empty line before
-
-            final_xml_string = '\n'.join(final_xml_lines)
-
-        except Exception as parse_err:
-             print(f"    Warning: minidom pretty printing failed ({parse_err}). Writing raw XML.")
-             final_xml_string = xml_string # Fallback to raw string
+        for output_file, _ in outputs:
+            writers.append(AndroidStringsWriter(output_file, comment))
+    except OSError as e:
+        for writer in reversed(writers): # Last first, so a directory the first one created is empty again
+            writer.abort()
+        print(f"  Error generating XML for {lang_code}: {e}")
+        return None
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(final_xml_string)
-        return output_file
+    cursors = [0] * len(outputs)
+    def write_ready():
+        with METRICS.phase('write', lang_code):
+            for position, (writer, (_, entries)) in enumerate(zip(writers, outputs)):
+                cursors[position] = write_ready_entries(writer, entries, cursors[position])
 
-    except Exception as e:
+    try:
+        write_ready()
+        for _ in translate_pending(client, pending, lang_code, memory, journal, stop):
+            write_ready()
+        write_ready()
+        with METRICS.phase('write', lang_code):
+            for writer in writers:
+                writer.commit()
+        if journal is not None:
+            journal.close(completed=True)
+        return [output_file for output_file, _ in outputs]
+    except OSError as e:
+        for writer in reversed(writers):
+            writer.abort()
         print(f"  Error generating XML for {lang_code}: {e}")
         return None
+    except BaseException:
+        for writer in reversed(writers):
+            writer.abort()
+        raise
+    finally:
+        if journal is not None:
+            journal.close(completed=False)
+
+def estimate_requests(texts, batch_size, batch_bytes):
+    """Counts the /translate requests translate_pending would send for `texts`, assuming no failures."""
+    requests_needed = 0
+    for start in range(0, len(texts), batch_size):
+        group = [(index, text) for index, text in enumerate(texts[start:start + batch_size]) if needs_translation(text)]
+        requests_needed += sum(1 for _ in chunk_batches(group, batch_size, batch_bytes))
+    return requests_needed
+
+def plan_language(resource_pairs, lang_code, memory, batch_size, batch_bytes):
+    """Computes the translation workload for one language without any network calls.
+
+    `resource_pairs` holds the (source, existing) resources of each file, with the fingerprints the
+    existing values were written from. Strings, array items and plural items are counted as new
+    (missing from the locale file), changed (English source changed since it was translated), stale
+    (no longer in the source) or unchanged.
+    """
+    seed_memory = not memory.has_language(lang_code)
+    counts = {kind: {'new': 0, 'changed': 0, 'stale': 0, 'unchanged': 0} for kind in ('strings', 'array_items', 'plural_items')}
+    to_translate = []
+
+    def count(kind, source_item, existing_value, produced_from):
+        action = classify_value(source_item, existing_value, lang_code, memory, seed_memory, produced_from)
+        if action == 'translate':
+            to_translate.append(compile_template(source_item.text, lang_code).masked)
+        if existing_value is None:
+            counts[kind]['new'] += 1
+        elif action == 'translate' or is_outdated(source_item, existing_value, produced_from):
+            counts[kind]['changed'] += 1
+        else:
+            counts[kind]['unchanged'] += 1
+
+    for source_resources, existing_resources, produced_from in resource_pairs:
+        for name, source in source_resources.items():
+            existing = existing_resources.get(name)
+            if source.tag == 'string':
+                count('strings', source.value, existing.value.text if existing is not None and existing.tag == 'string' else None, produced_from.get(name))
+                continue
+            kind = 'plural_items' if source.tag == 'plurals' else 'array_items'
+            for index, (source_item, existing_item) in enumerate(pair_items(source, existing)):
+                if source_item is None:
+                    # A quantity only the locale needs (e.g. "few") is not stale
+                    counts[kind]['stale'] += kind == 'array_items'
+                    continue
+                count(kind, source_item, existing_item.text if existing_item is not None else None, produced_from.get(source_key(name, index)))
+        for name, existing in existing_resources.items():
+            if name in source_resources: continue
+            if existing.tag == 'string':
+                counts['strings']['stale'] += 1
+            else:
+                counts['plural_items' if existing.tag == 'plurals' else 'array_items']['stale'] += len(existing.items)
+
+    unique = list(dict.fromkeys(to_translate)) # Duplicates are translated once, as in translate_pending
+    return {
+        **counts,
+        'to_translate': len(to_translate),
+        'unique': len(unique),
+        'dedup_ratio': round(1 - len(unique) / len(to_translate), 4) if to_translate else 0.0,
+        'resolved_locally': sum(1 for text in unique if not needs_translation(text)),
+        'characters': sum(len(text) for text in unique if needs_translation(text)),
+        'requests': estimate_requests(unique, batch_size, batch_bytes),
+    }
+
+def plan_translations(source_path, sources, languages, memory, batch_size, batch_bytes):
+    """Builds the machine-readable --plan report for all target languages."""
+    plan = {'source': source_path, 'files': [source['path'] for source in sources], 'languages': {}}
+    for lang in languages:
+        resource_pairs = []
+        for source in sources:
+            locale_file = os.path.join(source['res_dir'], f"values-{lang}", source['filename'])
+            resource_pairs.append((source['resources'], load_existing_translations(locale_file), memory.produced_from(locale_file)))
+        plan['languages'][lang] = plan_language(resource_pairs, lang, memory, batch_size, batch_bytes)
+    plan['totals'] = {
+        key: sum(language[key] for language in plan['languages'].values())
+        for key in ('to_translate', 'unique', 'resolved_locally', 'characters', 'requests')
+    }
+    plan['empty'] = plan['totals']['to_translate'] == 0
+    return plan
+
+def describe_signature(text):
+    """Renders the format signature of `text` as positional specifiers, e.g. "%1$d, %2$s"."""
+    return ", ".join(f"%{index}${conversion}" for index, conversion in format_signature(text)) or "none"
+
+def verify_value(issues, label, original_value, value, lang_code):
+    """Checks one translated string or item against its English source."""
+    if not original_value or not original_value.strip(): return
+    if INTERNAL_PLACEHOLDER_REGEX.search(value):
+        issues.append((label, 'placeholders', f"internal placeholder marker left in '{value}'"))
+    elif format_signature(value) != format_signature(original_value):
+        issues.append((label, 'placeholders', f"has format specifiers ({describe_signature(value)}), the source has ({describe_signature(original_value)})"))
+    # An escaped value escapes to itself; anything else has a bare quote, newline or backslash
+    if escape_android_string(value) != value and escape_android_string(original_value) == original_value:
+        issues.append((label, 'escaping', f"unescaped quote, newline or backslash in '{value}'"))
+    elif value.count('\\\\') > original_value.count('\\\\'):
+        issues.append((label, 'escaping', f"escaped more than once: '{value}'"))
+    if value == original_value and needs_translation(compile_template(original_value, lang_code).masked):
+        issues.append((label, 'untranslated', f"identical to the English source '{value}'"))
+
+def verify_resources(source_resources, locale_resources, lang_code):
+    """Compares a parsed locale file with its English source. Returns (name, check, message) issues."""
+    issues = []
+    for name, source in source_resources.items():
+        locale = locale_resources.get(name)
+        if locale is None:
+            issues.append((name, 'missing', "not translated"))
+            continue
+        if source.tag != locale.tag:
+            issues.append((name, 'type_mismatch', f"is a {locale.tag}, not a {source.tag}"))
+            continue
+        if source.tag == 'string':
+            verify_value(issues, name, source.value.text, locale.value.text, lang_code)
+            continue
+        if source.tag == 'string-array':
+            if len(source.items) != len(locale.items):
+                issues.append((name, 'array_length', f"has {len(locale.items)} items, the source has {len(source.items)}"))
+            for index, (source_item, locale_item) in enumerate(zip(source.items, locale.items)):
+                verify_value(issues, f"{name}[{index}]", source_item.text, locale_item.text, lang_code)
+            continue
+        # Locales need different plural quantities; each must carry the specifiers of "other"
+        if 'other' not in [item.attribute('quantity') for item in locale.items]:
+            issues.append((name, 'array_length', "has no quantity=\"other\" item"))
+        source_other = next((item for item in source.items if item.attribute('quantity') == 'other'), source.items[-1] if source.items else None)
+        for source_item, locale_item in pair_items(source, locale):
+            if locale_item is None: continue
+            label = f"{name}[{locale_item.attribute('quantity')}]"
+            if source_item is not None:
+                verify_value(issues, label, source_item.text, locale_item.text, lang_code)
+            elif source_other is not None and format_signature(locale_item.text) != format_signature(source_other.text):
+                issues.append((label, 'placeholders', f"has format specifiers ({describe_signature(locale_item.text)}), \"other\" in the source has ({describe_signature(source_other.text)})"))
+    for name in locale_resources:
+        if name not in source_resources:
+            issues.append((name, 'stale', "no longer in the English source"))
+    return issues
+
+def verify_locale_file(source_resources, locale_path, lang_code):
+    """Parses and checks one locale file; runs in a worker process."""
+    try:
+        locale_resources = parse_resources(locale_path)
+    except FileNotFoundError:
+        return [(None, 'missing_file', "locale file does not exist")]
+    except (ET.ParseError, OSError) as e:
+        return [(None, 'xml', f"cannot be parsed: {e}")]
+    return verify_resources(source_resources, locale_resources, lang_code)
+
+class VerifyCache:
+    """--verify results per locale file, reused while the file, its source and the glossary are unchanged."""
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == VERIFY_CACHE_VERSION:
+                    self.files = data.get('files', {})
+            except (OSError, ValueError) as e:
+                print(f"Warning: Ignoring unreadable verify cache {path}: {e}")
+
+    def save(self):
+        if not self.path: return
+        directory = os.path.dirname(self.path) or "."
+        fd, temp_file = tempfile.mkstemp(prefix=".verify-cache-", suffix=".tmp", dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': VERIFY_CACHE_VERSION, 'files': self.files}, f)
+        replace_file(temp_file, self.path)
+
+def file_digest(file_path):
+    """Returns the SHA-256 of a file's content, or None if it does not exist."""
+    try:
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
 
+def verify_translations(sources, languages, cache):
+    """Checks every locale file of `sources` against its English source, without any translation.
+
+    Files whose content, English source and glossary are unchanged since the last check reuse the
+    cached result; the others are checked in parallel, one process per CPU core. Returns
+    {locale file: [(name, check, message)]} and the number of files that were checked.
+    """
+    glossary_digest = hashlib.sha256(json.dumps(GLOSSARY.entries, sort_keys=True).encode('utf-8')).hexdigest()
+    results, to_check = {}, []
+    for source in sources:
+        source_digest = file_digest(source['path'])
+        for lang in languages:
+            locale_path = os.path.join(source['res_dir'], f"values-{lang}", source['filename'])
+            key = f"{file_digest(locale_path)}:{source_digest}:{glossary_digest}:{lang}"
+            cached = cache.files.get(locale_path)
+            if cached and cached['key'] == key:
+                results[locale_path] = [tuple(issue) for issue in cached['issues']]
+            else:
+                results[locale_path] = None # Keeps the report in source and language order
+                to_check.append((source, lang, locale_path, key))
+    if to_check:
+        # Parsing and checking is CPU-bound, so it runs in processes; each worker gets the glossary
+        with ProcessPoolExecutor(max_workers=min(len(to_check), os.cpu_count() or 1), initializer=set_glossary, initargs=(GLOSSARY,)) as executor:
+            futures = [executor.submit(verify_locale_file, source['resources'], locale_path, lang) for source, lang, locale_path, _ in to_check]
+            for (_, _, locale_path, key), future in zip(to_check, futures):
+                results[locale_path] = future.result()
+                cache.files[locale_path] = {'key': key, 'issues': results[locale_path]}
+    return results, len(to_check)
+
+def prepare_language(lang, sources, memory, checkpoint_dir=None, resume=False, locale_cache=None):
+    """Builds the translation job for one language from its existing files, without network calls.
+
+    The memory misses of all files go into one queue, so a string used in several files or modules
+    is translated once. The job's `characters` (the unique text still to translate) lets the caller
+    dispatch the costliest languages first.
+    """
+    print(f"\nProcessing language: {lang} ({SUPPORTED_LANGUAGES.get(lang, 'Unknown')})...")
+    # Decided once per language, before the first file seeds the memory
+    seed_memory = not memory.has_language(lang)
+    outputs, pending, created_dirs = [], [], set()
+    for source in sources:
+        lang_dir = os.path.join(source['res_dir'], f"values-{lang}")
+        existing_file = os.path.join(lang_dir, source['filename'])
+        with METRICS.phase('parse_existing', lang):
+            existing_resources = locale_cache.load(existing_file) if locale_cache else load_existing_translations(existing_file)
+        if existing_resources:
+            print(f"  Found {len(existing_resources)} existing resource entries in {existing_file}")
+        elif not os.path.isdir(lang_dir) and lang_dir not in created_dirs:
+            created_dirs.add(lang_dir)
+            print(f"  Creating {lang_dir}")
+        with METRICS.phase('prepare', lang):
+            outputs.append((existing_file, build_entries(source['resources'], existing_resources, lang, memory, seed_memory, pending, memory.produced_from(existing_file))))
+
+    journal = CheckpointJournal(os.path.join(checkpoint_dir, f"values-{lang}.jsonl"), resume) if checkpoint_dir else None
+    if journal is not None:
+        with METRICS.phase('prepare', lang):
+            pending = replay_checkpoint(journal, pending, lang, memory)
+    characters = sum(len(masked) for masked, _ in group_duplicates(pending, lang) if needs_translation(masked))
+    return {'lang': lang, 'outputs': outputs, 'pending': pending, 'journal': journal, 'characters': characters}
+
+def translate_language(client, job, memory, locale_cache=None, stop=None):
+    """Translates a prepared language job and regenerates its resource files; missing values-<lang> directories are created.
+
+    Returns None, leaving the other languages running, if the backend cannot translate into this language.
+    Written files are recorded in `locale_cache`, so the next --watch cycle doesn't parse them again.
+    Setting `stop` interrupts the job between batches, keeping the existing files and its checkpoint.
+    """
+    try:
+        output_files = generate_xml(client, job['outputs'], job['pending'], job['lang'], memory, job['journal'], stop)
+    except LanguageUnavailable as e:
+        print(f"  [{job['lang']}] Error: {e}")
+        return None
+    if output_files:
+        for output_file, entries in job['outputs']:
+            memory.record_sources(output_file, entry_sources(entries))
+            if locale_cache is not None:
+                locale_cache.remember(output_file, entries)
+    return output_files
+
+def run_translations(client, sources, languages, memory, checkpoint_dir, args, locale_cache=None):
+    """Translates `sources` into every language, longest language first, and reports per language.
+
+    Raises TranslationServiceUnavailable if the backend stops answering. On Ctrl-C, languages that
+    have not started are cancelled and running ones stop after their current batch.
+    """
+    counts_before = (Counter(memory.hits), Counter(memory.misses), Counter(memory.seeded))
+    language_jobs = [prepare_language(lang, sources, memory, checkpoint_dir, args.resume, locale_cache) for lang in languages]
+    # Longest first: the languages with the most characters to translate start first, so no big
+    # language is left running alone at the end
+    language_jobs.sort(key=lambda job: job['characters'], reverse=True)
+    if args.chars_per_second > 0:
+        total_characters = sum(job['characters'] for job in language_jobs)
+        print(f"Sending at most {args.chars_per_second} characters/s: about {total_characters / args.chars_per_second:.0f}s for {total_characters} characters")
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(args.jobs, len(languages))))
+    try:
+        futures = {job['lang']: executor.submit(translate_language, client, job, memory, locale_cache, stop) for job in language_jobs}
+        # Results are reported (and memory flushed) in language order, whatever order workers finish in
+        for lang in languages:
+            output_files = futures[lang].result()
+            memory.flush(lang)
+            if output_files:
+                for output_file in output_files:
+                    print(f"  [{lang}] Generated/Updated {output_file}")
+            else:
+                print(f"  [{lang}] Failed to generate file for language {lang}")
+            hits, misses, seeded = (counts[lang] - before[lang] for counts, before in zip((memory.hits, memory.misses, memory.seeded), counts_before))
+            print(f"  [{lang}] Translation memory: {hits} hits, {misses} misses, {seeded} seeded from existing file")
+    except BaseException:
+        # Only the main thread sees Ctrl-C: stop the workers instead of waiting for every queued language
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+def changed_keys(old_resources, new_resources):
+    """Returns the names added or changed in a source file.
+
+    Removed names are left out: locale files keep entries the source no longer has, so a removal
+    alone changes no output.
+    """
+    return [name for name, data in new_resources.items() if old_resources.get(name) != data]
+
+def file_version(file_path):
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def watch_sources(client, sources, languages, memory, checkpoint_dir, args, locale_cache):
+    """Re-translates the affected locale files whenever a source file changes, until interrupted.
+
+    The client, source models, translation memory and parsed locale files stay in memory between
+    changes, so an edit costs one parse of the changed file and a request for the changed keys.
+    """
+    versions = {source['path']: file_version(source['path']) for source in sources}
+    print(f"\nWatching {len(sources)} source file(s) for changes every {args.watch_interval:g}s (Ctrl-C to stop)...")
+    try:
+        while True:
+            time.sleep(args.watch_interval)
+            modified = [source for source in sources if file_version(source['path']) not in (None, versions[source['path']])]
+            if not modified: continue
+            # Editors often save in several writes; wait until the files stop changing
+            while True:
+                settled = {source['path']: file_version(source['path']) for source in modified}
+                time.sleep(WATCH_SETTLE_SECONDS)
+                if all(file_version(path) == version for path, version in settled.items()): break
+
+            started = time.perf_counter()
+            changed_sources = []
+            for source in modified:
+                versions[source['path']] = settled[source['path']]
+                try:
+                    resources = translatable_resources(parse_resources(source['path']))
+                except (ET.ParseError, OSError) as e:
+                    print(f"[watch] Skipping {source['path']} until it parses again: {e}")
+                    continue
+                changed = changed_keys(source['resources'], resources)
+                if not changed:
+                    source['resources'] = resources
+                    print(f"[watch] {source['path']} saved without added or changed keys; nothing to translate")
+                    continue
+                print(f"[watch] {source['path']}: {len(changed)} added or changed keys ({', '.join(changed[:5])}{', ...' if len(changed) > 5 else ''})")
+                changed_sources.append((source, resources))
+            if not changed_sources: continue
+
+            try:
+                client.reset_circuit()
+                run_translations(client, [dict(source, resources=resources) for source, resources in changed_sources], languages, memory, checkpoint_dir, args, locale_cache)
+            except TranslationServiceUnavailable as e:
+                print(f"[watch] {e}. Will retry on the next poll.")
+                for source, _ in changed_sources:
+                    versions[source['path']] = None # Keeps the old model, so the same keys are retried
+                continue
+            for source, resources in changed_sources:
+                source['resources'] = resources
+            print(f"[watch] Updated {len(changed_sources) * len(languages)} locale file(s) in {time.perf_counter() - started:.2f}s")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+def write_metrics_reports(args, memory):
+    """Writes the --metrics-json and --trace-json files, if requested."""
+    if args.metrics_json:
+        for lang in set(memory.hits) | set(memory.misses) | set(memory.seeded):
+            METRICS.counters[lang].update({'memory_hits': memory.hits[lang], 'memory_misses': memory.misses[lang], 'memory_seeded': memory.seeded[lang]})
+        report = METRICS.report()
+        with open(args.metrics_json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote metrics to {args.metrics_json}")
+    if args.trace_json:
+        with open(args.trace_json, 'w', encoding='utf-8') as f:
+            json.dump(METRICS.chrome_trace(), f)
+        print(f"Wrote Chrome trace to {args.trace_json}")
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Translate Android string resources using a local LibreTranslate instance"
+        description="Translate Android string resources using a local LibreTranslate instance or Argos Translate models"
     )
     parser.add_argument(
         "--source",
@@ -394,72 +2006,312 @@ def main():
         default="PHMS-Android/app/src/main/res",
         help="Root resource directory (e.g., app/src/main/res)"
     )
+    parser.add_argument(
+        "--project",
+        nargs="?",
+        const=os.path.join("..", "..", "PHMS-Android"),
+        help="Translate every res/values/*.xml file (strings, arrays and plurals) of every module under this "
+             "Android project in one run, instead of --source/--res-dir (default: the PHMS-Android project)"
+    )
     parser.add_argument(
         "--languages",
         nargs="+",
         default=list(SUPPORTED_LANGUAGES.keys() - {'en'}),
         help="Languages to translate to (language codes)"
     )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Check every locale file against the English source (specifiers, escaping, missing, stale and "
+             "untranslated keys, array lengths) without translating anything; exits with 1 on errors"
+    )
+    parser.add_argument(
+        "--verify-cache",
+        help=f"Where --verify keeps results of unchanged files (default: {DEFAULT_VERIFY_CACHE_FILENAME} next to the res directory; '' to disable)"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After the first run, keep running and re-translate the changed keys whenever a source file is saved"
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=WATCH_POLL_SECONDS,
+        help="Seconds between checks of the source files in --watch mode"
+    )
+    parser.add_argument(
+        "--glossary",
+        default=DEFAULT_GLOSSARY_FILENAME,
+        help="JSON glossary of protected terms and forced per-language translations (relative to this script); '' disables it"
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print the per-language translation workload as JSON without contacting LibreTranslate"
+    )
+    parser.add_argument(
+        "--metrics-json",
+        help="Write per-language and per-phase timings, request counts and latency histograms to this JSON file"
+    )
+    parser.add_argument(
+        "--trace-json",
+        help="Write the recorded phases as a Chrome trace file (open in chrome://tracing or Perfetto)"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=[LibreTranslateClient.name, ArgosTranslateBackend.name],
+        default=TRANSLATION_ENGINE,
+        help="Translation engine: the LibreTranslate HTTP server, or Argos Translate models loaded in this process"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="CPU threads per resident model with --backend argos (0: let CTranslate2 decide)"
+    )
+    parser.add_argument(
+        "--ready-timeout",
+        type=float,
+        default=DEFAULT_READY_TIMEOUT,
+        help="Seconds to keep polling a translation backend that is still starting before giving up"
+    )
+    parser.add_argument(
+        "--no-warm-up",
+        action="store_true",
+        help="Skip the concurrent warm-up translation that loads each language's model before the run"
+    )
+    parser.add_argument(
+        "--url",
+        default=LIBRETRANSLATE_URL,
+        help="Base URL of the LibreTranslate server"
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=DEFAULT_CONNECT_TIMEOUT,
+        help="Seconds to wait for a connection to LibreTranslate"
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        default=DEFAULT_READ_TIMEOUT,
+        help="Seconds to wait for a LibreTranslate response"
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help="Retries per request on 429/5xx responses and connection errors"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Maximum number of strings sent in one /translate request"
+    )
+    parser.add_argument(
+        "--batch-bytes",
+        type=int,
+        default=DEFAULT_BATCH_BYTES,
+        help="Maximum UTF-8 size of the strings sent in one /translate request"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of languages to translate concurrently"
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        help="Maximum number of concurrent /translate requests across all languages"
+    )
+    parser.add_argument(
+        "--chars-per-second",
+        type=int,
+        default=DEFAULT_CHARS_PER_SECOND,
+        help="Maximum characters sent to the translation backend per second across all languages (0: unlimited)"
+    )
+    parser.add_argument(
+        "--memory",
+        help=f"Path to the translation memory JSONL file (default: {DEFAULT_MEMORY_FILENAME} next to --res-dir)"
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        help=f"Directory for per-language checkpoint journals (default: {DEFAULT_CHECKPOINT_DIRNAME} next to --res-dir)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse translations journaled by an interrupted run instead of discarding them"
+    )
+    parser.add_argument(
+        "--engine-version",
+        default="default",
+        help="Engine/model version recorded in the translation memory; change it to force re-translation"
+    )
 
     args = parser.parse_args()
+    if not args.plan:
+        run(args)
+        return
+    # Only the plan's JSON goes to stdout, so CI can pipe it into jq; every diagnostic goes to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        plan = run(args)
+    print(json.dumps(plan, indent=2))
+
+def run(args):
+    """Translates, plans or verifies the resources selected by the parsed command line.
+
+    Returns the --plan report in --plan mode.
+    """
+    METRICS.reset()
 
     # Determine the absolute paths based on the script's location if needed
     script_dir = os.path.dirname(os.path.realpath(__file__))
     default_source_path = os.path.join(script_dir, '..', '..', 'PHMS-Android', 'app', 'src', 'main', 'res', 'values', 'strings.xml')
     default_res_dir = os.path.join(script_dir, '..', '..', 'PHMS-Android', 'app', 'src', 'main', 'res')
 
-    source_path = args.source if os.path.isabs(args.source) else os.path.normpath(os.path.join(script_dir, args.source))
-    res_dir_path = args.res_dir if os.path.isabs(args.res_dir) else os.path.normpath(os.path.join(script_dir, args.res_dir))
+    if args.project:
+        project_dir = args.project if os.path.isabs(args.project) else os.path.normpath(os.path.join(script_dir, args.project))
+        if not os.path.isdir(project_dir):
+            print(f"Error: Project directory '{project_dir}' not found.")
+            sys.exit(1)
+        with METRICS.phase('parse_source'):
+            sources = find_resource_files(project_dir)
+        if not sources:
+            print(f"Error: No res/values/*.xml files with translatable resources found under '{project_dir}'.")
+            sys.exit(1)
+        source_path = project_dir
+        res_dirs = {source['res_dir'] for source in sources}
+        # Memory and checkpoints sit next to the res dir of a single-module project, as without --project
+        state_dir = os.path.dirname(res_dirs.pop()) if len(res_dirs) == 1 else project_dir
+    else:
+        source_path = args.source if os.path.isabs(args.source) else os.path.normpath(os.path.join(script_dir, args.source))
+        res_dir_path = args.res_dir if os.path.isabs(args.res_dir) else os.path.normpath(os.path.join(script_dir, args.res_dir))
 
-    # Use default paths if the provided ones don't exist, but check defaults too
-    if not os.path.isfile(source_path):
-        print(f"Warning: Specified source '{args.source}' not found at '{source_path}'. Trying default path.")
-        source_path = default_source_path
+        # Use default paths if the provided ones don't exist, but check defaults too
         if not os.path.isfile(source_path):
-             print(f"Error: Default source file '{source_path}' not found either.")
-             sys.exit(1)
-        else:
-             print(f"Using default source path: '{source_path}'")
+            print(f"Warning: Specified source '{args.source}' not found at '{source_path}'. Trying default path.")
+            source_path = default_source_path
+            if not os.path.isfile(source_path):
+                 print(f"Error: Default source file '{source_path}' not found either.")
+                 sys.exit(1)
+            else:
+                 print(f"Using default source path: '{source_path}'")
 
 
-    if not os.path.isdir(res_dir_path):
-        print(f"Warning: Specified res-dir '{args.res_dir}' not found at '{res_dir_path}'. Trying default path.")
-        res_dir_path = default_res_dir
         if not os.path.isdir(res_dir_path):
-             print(f"Error: Default resource directory '{res_dir_path}' not found either.")
-             sys.exit(1)
-        else:
-            print(f"Using default resource directory: '{res_dir_path}'")
+            print(f"Warning: Specified res-dir '{args.res_dir}' not found at '{res_dir_path}'. Trying default path.")
+            res_dir_path = default_res_dir
+            if not os.path.isdir(res_dir_path):
+                 print(f"Error: Default resource directory '{res_dir_path}' not found either.")
+                 sys.exit(1)
+            else:
+                print(f"Using default resource directory: '{res_dir_path}'")
 
-    available_languages = check_libretranslate()
-    print(f"LibreTranslate is running with {len(available_languages)} available languages.")
+        with METRICS.phase('parse_source'):
+            source_resources = translatable_resources(extract_resources(source_path))
+        # Whatever the source file is called, the locale files are strings.xml
+        sources = [{'path': source_path, 'res_dir': res_dir_path, 'filename': "strings.xml", 'resources': source_resources}]
+        state_dir = os.path.dirname(res_dir_path)
 
-    source_resources = extract_resources(source_path)
-    print(f"Extracted {len(source_resources)} resource entries from {source_path}")
+    if args.glossary:
+        glossary_path = args.glossary if os.path.isabs(args.glossary) else os.path.join(script_dir, args.glossary)
+        try:
+            set_glossary(Glossary.load(glossary_path))
+        except FileNotFoundError:
+            if args.glossary != DEFAULT_GLOSSARY_FILENAME:
+                print(f"Error: Glossary '{glossary_path}' not found.")
+                sys.exit(1)
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Error: Could not load glossary '{glossary_path}': {e}")
+            sys.exit(1)
+    else:
+        set_glossary(Glossary())
+
+    if args.verify:
+        target_languages = [lang for lang in args.languages if lang != 'en']
+        cache = VerifyCache(args.verify_cache if args.verify_cache is not None else os.path.join(state_dir, DEFAULT_VERIFY_CACHE_FILENAME))
+        started = time.perf_counter()
+        results, checked = verify_translations(sources, target_languages, cache)
+        cache.save()
+        errors = warnings = 0
+        for locale_path, issues in results.items():
+            for name, check, message in issues:
+                severity = 'warning' if check in VERIFY_WARNINGS else 'error'
+                errors += severity == 'error'
+                warnings += severity == 'warning'
+                print(f"{locale_path}: {severity}: {name + ': ' if name else ''}{message} [{check}]")
+        print(f"Verified {len(results)} locale files in {time.perf_counter() - started:.2f}s ({checked} checked, {len(results) - checked} unchanged): {errors} errors, {warnings} warnings")
+        if errors:
+            sys.exit(1)
+        return
+
+    memory_path = args.memory or os.path.join(state_dir, DEFAULT_MEMORY_FILENAME)
+    memory = TranslationMemory(memory_path, f"{args.backend}:{args.engine_version}")
+
+    if args.plan:
+        target_languages = [lang for lang in args.languages if lang != 'en']
+        return plan_translations(source_path, sources, target_languages, memory, args.batch_size, args.batch_bytes)
+
+    try:
+        client = create_backend(args)
+    except ImportError as e:
+        print(f"Error: --backend {args.backend} needs a missing package ({e}).")
+        print(ArgosTranslateBackend.setup_hint)
+        sys.exit(1)
+    ready_started = time.perf_counter()
+    with METRICS.phase('check_server'):
+        available_languages = check_libretranslate(client, args.ready_timeout)
+    server_ready = time.perf_counter() - ready_started
+    print(f"{client.description} is ready with {len(available_languages)} available languages ({server_ready:.1f}s).")
+
+    for source in sources:
+        print(f"Extracted {len(source['resources'])} resource entries from {source['path']}")
 
     valid_target_languages = [lang for lang in args.languages if lang in available_languages and lang != 'en']
 
     if not valid_target_languages:
-         print("No valid target languages available/selected in LibreTranslate instance. Exiting.")
+         print(f"No valid target languages available/selected in {client.description}. Exiting.")
          sys.exit(0)
 
     print(f"Target languages: {', '.join(valid_target_languages)}")
 
-    for lang in valid_target_languages:
-        lang_dir = os.path.join(res_dir_path, f"values-{lang}")
-        existing_file = os.path.join(lang_dir, "strings.xml")
-        existing_resources = load_existing_translations(existing_file)
+    if not args.no_warm_up:
+        warm_up_started = time.perf_counter()
+        warm_up_times = warm_up(client, valid_target_languages)
+        loaded = [f"{lang} {seconds:.1f}s" for lang, seconds in warm_up_times.items() if seconds is not None]
+        print(f"Warmed up {len(loaded)}/{len(valid_target_languages)} language models in {time.perf_counter() - warm_up_started:.1f}s ({', '.join(loaded)})")
+        print(f"Time to ready: {time.perf_counter() - ready_started:.1f}s")
 
-        print(f"\nProcessing language: {lang} ({SUPPORTED_LANGUAGES.get(lang, 'Unknown')})...")
-        if existing_resources:
-            print(f"  Found {len(existing_resources)} existing resource entries in {existing_file}")
+    print(f"Loaded {len(memory.entries)} translation memory entries from {memory_path}")
+    checkpoint_dir = args.checkpoint_dir or os.path.join(state_dir, DEFAULT_CHECKPOINT_DIRNAME)
 
-        output_file = generate_xml(source_resources, existing_resources, lang_dir, lang)
-        if output_file:
-            print(f"  Generated/Updated {output_file}")
-        else:
-            print(f"  Failed to generate file for language {lang}")
+    jobs = max(1, min(args.jobs, len(valid_target_languages)))
+    if jobs > 1:
+        print(f"Translating {jobs} languages concurrently (at most {args.max_in_flight} requests in flight)")
 
+    try:
+        # In --watch mode the files written by the first run are already parsed for the first change
+        locale_cache = LocaleFileCache() if args.watch else None
+        run_translations(client, sources, valid_target_languages, memory, checkpoint_dir, args, locale_cache)
+        if args.watch:
+            watch_sources(client, sources, valid_target_languages, memory, checkpoint_dir, args, locale_cache)
+    except TranslationServiceUnavailable as e:
+        print(f"\nError: {e}. Stopping instead of writing untranslated English.")
+        print("Finished translations were saved to the translation memory; re-run once the translation backend has recovered.")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\nInterrupted. Existing locale files were left unchanged; re-run with --resume to continue from the checkpoint.")
+        sys.exit(130)
+    finally:
+        memory.flush()
+        write_metrics_reports(args, memory)
+
+    print(f"\nTranslation memory totals: {sum(memory.hits.values())} hits, {sum(memory.misses.values())} misses, {sum(memory.seeded.values())} seeded")
     print("\nTranslation process completed!")
 
 if __name__ == "__main__":